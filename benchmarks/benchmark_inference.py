@@ -0,0 +1,49 @@
+# benchmarks/benchmark_inference.py
+# Usage: python -m benchmarks.benchmark_inference [n_trees] [n_rows]
+import sys
+import time
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from src.modeling.flat_forest import FlatForest
+
+N_FEATURES = 10
+
+def make_forest(n_trees, n_samples=20000, seed=0):
+    """Forest fitted like the trainer's on synthetic float32 features and 3 classes"""
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n_samples, N_FEATURES)).astype(np.float32)
+    y = (X[:, 0] + rng.normal(0, 1, n_samples) > 0).astype(int) + (X[:, 1] > 1)
+    model = RandomForestClassifier(n_estimators=n_trees, class_weight='balanced', random_state=seed, n_jobs=-1)
+    return model.fit(X, y)
+
+def best_of(func, X, repeat=5):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(X)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+def main():
+    n_trees = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    n_rows = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+    model = make_forest(n_trees)
+    forest = FlatForest.from_model(model)
+    X = np.random.default_rng(1).normal(size=(n_rows, N_FEATURES)).astype(np.float32)
+
+    timings = {}
+    for name, scorer in (('sklearn', model), ('flat', forest)):
+        single_time, _ = best_of(scorer.predict_proba, X[:1])
+        batch_time, proba = best_of(scorer.predict_proba, X)
+        timings[name] = (single_time, batch_time, proba)
+
+    np.testing.assert_allclose(timings['flat'][2], timings['sklearn'][2], rtol=0, atol=1e-12)
+
+    print(f"forest: {n_trees} trees, batch: {n_rows} rows")
+    for name, (single_time, batch_time, _) in timings.items():
+        print(f"{name:8s} single row: {single_time * 1000:.2f} ms  "
+              f"batch: {batch_time * 1000:.1f} ms ({batch_time * 1e6 / n_rows:.1f} us/row)")
+    print(f"single-row speedup: {timings['sklearn'][0] / timings['flat'][0]:.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# benchmarks/load_test_server.py
+# Usage: python -m benchmarks.load_test_server [n_clients] [requests_per_client] [horizon]
+# Start the server first: python run_server.py
+import sys
+import json
+import time
+import asyncio
+from src.utils.config_loader import load_config
+
+config = load_config()
+
+async def request(reader, writer, path):
+    """One keep-alive GET; returns the decoded JSON body"""
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+    await writer.drain()
+    await reader.readline()
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode().partition(':')
+        if name.lower() == 'content-length':
+            length = int(value)
+    return json.loads(await reader.readexactly(length))
+
+async def client(host, port, paths, latencies):
+    reader, writer = await asyncio.open_connection(host, port)
+    for path in paths:
+        start = time.perf_counter()
+        await request(reader, writer, path)
+        latencies.append(time.perf_counter() - start)
+    writer.close()
+
+async def main():
+    n_clients = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    n_requests = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    horizon = sys.argv[3] if len(sys.argv) > 3 else config['training']['horizon']
+    host, port = config['serving'].get('host', '127.0.0.1'), config['serving'].get('port', 8765)
+
+    # Spread requests over the symbols the server has current features for
+    reader, writer = await asyncio.open_connection(host, port)
+    before = await request(reader, writer, '/metrics')
+    symbols = (await request(reader, writer, f"/symbols?horizon={horizon}"))['symbols']
+    writer.close()
+
+    paths = [
+        [f"/predict?symbol={symbols[(c + i) % len(symbols)]}&horizon={horizon}" for i in range(n_requests)]
+        for c in range(n_clients)
+    ]
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*(client(host, port, client_paths, latencies) for client_paths in paths))
+    elapsed = time.perf_counter() - start
+
+    reader, writer = await asyncio.open_connection(host, port)
+    after = await request(reader, writer, '/metrics')
+    writer.close()
+
+    latencies.sort()
+    batches = after['batches'] - before['batches']
+    print(f"{len(latencies)} requests from {n_clients} clients in {elapsed:.2f} s "
+          f"({len(latencies) / elapsed:.0f} req/s)")
+    for q in (0.5, 0.95, 0.99):
+        print(f"p{int(q * 100)} latency: {latencies[int(q * (len(latencies) - 1))] * 1000:.1f} ms")
+    print(f"model calls: {batches} (mean batch {len(latencies) / max(batches, 1):.1f} requests)")
+
+if __name__ == "__main__":
+    asyncio.run(main())
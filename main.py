@@ -2,45 +2,207 @@
 import time
 import pandas as pd
 from datetime import datetime
-from src.processing.data_loader import load_raw_data
-from src.processing.feature_engineering import calculate_technical_features, calculate_broker_features
-from src.processing.target_generator import generate_targets
+from src.processing.data_loader import (
+    load_raw_data, data_watermark, list_raw_files, window_cutoff, files_after
+)
+from src.processing.feature_engineering import (
+    calculate_broker_features_all_modes, summarize_daily, compute_technical_indicators,
+    broker_features_all_modes, build_indicator_state, update_technical_features,
+    feature_params, TECHNICAL_COLUMNS, BROKER_MODES, FEATURE_VERSION
+)
+from src.processing.indicators import LOOKBACK
+from src.processing.streaming import stream_daily_aggregates
+from src.processing.target_generator import generate_multi_horizon_targets, select_horizon
 from src.modeling.trainer import IncrementalTrainer
+from src.modeling.multi_horizon import train_all_horizons
+from src.modeling.cross_validation import run_cross_validation
 from src.modeling.evaluator import evaluate_model, log_evaluation
+from src.modeling.predictor import precompute_signals
 from src.utils.config_loader import load_config
+from src.utils.data_manager import (
+    save_daily_store, load_daily_store, append_daily_store, save_targets, daily_store_exists,
+    daily_store_last_date,
+    save_indicator_state, load_indicator_state, latest_feature_key, load_feature_manifest,
+    feature_key, feature_set_exists, save_feature_set, append_feature_set, load_feature_set,
+    prune_feature_sets
+)
 from src.utils.logger import get_logger
 
+FEATURE_SETS = ['daily', 'technical'] + [f"broker_{mode}" for mode in BROKER_MODES]
+
+def build_features(config, logger, files=None, cutoff=None, state=None):
+    """Load raw data and compute every feature frame of a feature set.
+
+    ``cutoff`` marks a windowed build: rows up to it come from the full-history
+    daily store, whose last closes per symbol also warm up the indicators of
+    the later days computed here.
+    With an indicator ``state``, ``files`` are the days after it and only
+    their rows are computed, appended to the store and returned.
+    """
+    if config['data'].get('ingest_mode', 'full') == 'streaming':
+        # 1-2. Stream floor sheets straight into daily aggregates
+        logger.info("Streaming raw data into daily aggregates")
+        daily_bars, broker_activity, large_trades = stream_daily_aggregates(files)
+        
+        logger.info("Calculating broker features")
+        broker_features_by_mode = broker_features_all_modes(broker_activity, large_trades)
+    else:
+        # 1. Data loading and cleaning
+        logger.info("Loading raw data")
+        raw_data = load_raw_data(files)
+        
+        # 2. Feature engineering
+        daily_bars = summarize_daily(raw_data)
+        
+        logger.info("Calculating broker features")
+        broker_features_by_mode = calculate_broker_features_all_modes(raw_data)
+    
+    if daily_bars.empty:
+        return None
+    
+    logger.info("Calculating technical features")
+    if state is not None:
+        # Only days after the saved state are computed, and only their months of the store rewritten
+        daily_features = update_technical_features(daily_bars, state)
+        append_daily_store(daily_features)
+    else:
+        if cutoff is not None and daily_store_exists():
+            stored = load_daily_store()
+            stored = stored[stored['Date'] <= cutoff]
+            # Each symbol's indicator warm-up is its last stored closes, however long ago it traded
+            warmup = stored.sort_values(['Symbol', 'Date']).groupby('Symbol', observed=True).tail(LOOKBACK)
+            bars = pd.concat([warmup[daily_bars.columns], daily_bars[daily_bars['Date'] > cutoff]], ignore_index=True)
+            bars['Symbol'] = bars['Symbol'].astype(str).astype('category')
+            daily_features = compute_technical_indicators(bars)
+            daily_features = daily_features[daily_features['Date'] > cutoff]
+            broker_features_by_mode = {
+                mode: df[df['Date'] > cutoff] for mode, df in broker_features_by_mode.items()
+            }
+            store = pd.concat([stored, daily_features], ignore_index=True)
+            store['Symbol'] = store['Symbol'].astype(str).astype('category')
+        else:
+            daily_features = compute_technical_indicators(daily_bars)
+            store = daily_features
+        state = build_indicator_state(store)
+        # Symbol-indexed daily store for per-symbol history lookups, always full history
+        save_daily_store(store)
+    save_indicator_state(state)
+    
+    frames = {
+        'daily': daily_features,
+        'technical': daily_features[TECHNICAL_COLUMNS]
+    }
+    for mode, broker_features in broker_features_by_mode.items():
+        frames[f"broker_{mode}"] = broker_features
+    return frames
+
+def incremental_base(config):
+    """Indicator state and the feature set it continues, or (None, None) when a full build is needed"""
+    if not config['features'].get('incremental', False) or not daily_store_exists():
+        return None, None
+    state = load_indicator_state()
+    base_key = latest_feature_key()
+    if state is None or base_key is None:
+        return None, None
+    # The state must continue exactly the latest feature set
+    last_date = load_feature_manifest(base_key).get('last_date')
+    if last_date is None or pd.Timestamp(last_date) != pd.Timestamp(state['last_date']):
+        return None, None
+    return state, base_key
+
 def run_pipeline():
+    start_time = time.time()
     config = load_config()
     logger = get_logger('pipeline', config['logs']['log_dir'])
     logger.info("Starting daily pipeline")
     
+    # 1-2. Features, reused from the feature store when inputs and feature code are unchanged
+    # Only the training window is read; earlier rows and indicator warm-up come from the daily store
+    files = list_raw_files()
+    cutoff = window_cutoff(files)
+    if cutoff is not None and daily_store_exists():
+        # Days the store is missing (no run for a while) are read from raw files too
+        cutoff = min(cutoff, daily_store_last_date())
+        files = files_after(files, cutoff)
+        logger.info(f"Training window after {cutoff.date()}: reading {len(files)} raw files")
+    elif cutoff is not None:
+        # The daily store keeps full history, so it is seeded from every file once
+        logger.info("No daily store yet; building features from full history")
+        cutoff = None
+    watermark = data_watermark(files)
+    key = feature_key(watermark, FEATURE_VERSION, feature_params())
+    if feature_set_exists(key):
+        logger.info(f"Reusing cached feature set {key}")
+        frames = load_feature_set(key, FEATURE_SETS)
+        if not daily_store_exists():
+            # Without a store the files above are full history, and so is this set
+            save_daily_store(frames['daily'])
+    else:
+        state, base_key = incremental_base(config)
+        new_files = files_after(files, state['last_date']) if state is not None else []
+        if new_files:
+            logger.info(f"Appending {len(new_files)} new days to feature set {base_key}")
+            frames = build_features(config, logger, new_files, state=state)
+        else:
+            frames = build_features(config, logger, files, cutoff)
+        if frames is None:
+            logger.error("No daily data available")
+            return
+        info = {
+            'watermark': watermark,
+            'version': FEATURE_VERSION,
+            'params': feature_params(),
+            'last_date': frames['daily']['Date'].max(),
+            'created': datetime.now().isoformat()
+        }
+        if new_files:
+            # Only the months of the new days are written; training reads the set back
+            append_feature_set(base_key, key, frames, info)
+            frames = load_feature_set(key, FEATURE_SETS, start=window_cutoff(files))
+        else:
+            save_feature_set(key, frames, info)
+        logger.info(f"Saved feature set {key}")
     
-    # 1. Data loading and cleaning
-    logger.info("Loading raw data")
-    raw_data = load_raw_data()
-    
-    # 2. Feature engineering
-    logger.info("Calculating technical features")
-    tech_features = calculate_technical_features(raw_data)
-    
-    logger.info(f"Calculating broker features ({config['training']['broker_mode']} mode)")
-    broker_features = calculate_broker_features(raw_data, mode=config['training']['broker_mode'])
+    tech_features = frames['technical']
+    broker_features = frames[f"broker_{config['training']['broker_mode']}"]
     
     # 3. Target generation
     logger.info("Generating targets")
-    targets = generate_targets(tech_features)
-    
-    # 4. Model training
-    logger.info("Starting model training")
-    trainer = IncrementalTrainer()
-    X_test, y_test, training_duration = trainer.train(tech_features, broker_features, targets)
-    
-    # 5. Model evaluation
-    if X_test is not None and y_test is not None:
-        logger.info("Evaluating model")
-        metrics = evaluate_model(trainer.model, trainer.le, X_test, y_test)
-        log_evaluation(metrics, training_duration, config['training']['horizon'])
+    targets_wide = generate_multi_horizon_targets(frames['daily'])
+    save_targets(targets_wide)
+    targets = select_horizon(targets_wide, config['training']['horizon'])
+    
+    if config['training'].get('multi_horizon', False):
+        # 4-5. Train and evaluate every horizon concurrently
+        logger.info("Starting multi-horizon model training")
+        results = train_all_horizons(tech_features, broker_features, targets_wide, feature_key=key)
+        for horizon, (metrics, training_duration) in results.items():
+            log_evaluation(metrics, training_duration, horizon)
+    else:
+        # 4. Model training
+        logger.info("Starting model training")
+        trainer = IncrementalTrainer()
+        X_test, y_test, training_duration = trainer.train(tech_features, broker_features, targets, feature_key=key)
+        
+        # 5. Model evaluation
+        if X_test is not None and y_test is not None:
+            logger.info("Evaluating model")
+            metrics = evaluate_model(trainer.model, trainer.le, X_test, y_test)
+            log_evaluation(metrics, training_duration, config['training']['horizon'])
+    
+    # 6. Precompute every symbol's signals for the app
+    logger.info("Precomputing daily signals")
+    precompute_signals()
+    
+    # Old feature sets are dropped once no saved model uses them
+    removed = prune_feature_sets()
+    if removed:
+        logger.info(f"Deleted {len(removed)} old feature sets")
+    
+    # 7. Walk-forward hyperparameter search
+    if config.get('cv', {}).get('enabled', False):
+        logger.info("Running walk-forward cross-validation")
+        run_cross_validation(tech_features, broker_features, targets_wide)
     
     logger.info(f"Pipeline completed in {time.time() - start_time:.2f} seconds")
 
@@ -0,0 +1,13 @@
+# run_server.py
+import sys
+import os
+
+# Add project root to Python path
+project_root = os.path.abspath(os.path.dirname(__file__))
+sys.path.insert(0, project_root)
+
+# Import and run the prediction server
+from src.serving.server import run_server
+
+if __name__ == "__main__":
+    run_server()
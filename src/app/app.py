@@ -3,9 +3,9 @@ import pandas as pd
 import os
 import numpy as np
 from datetime import datetime
-from src.modeling.predictor import Predictor
+from src.modeling.predictor import MultiPredictor
 from src.utils.config_loader import load_config
-from src.utils.data_manager import load_features
+from src.utils.data_manager import load_symbol_history
 from src.app.visualization import (
     display_signal, 
     plot_feature_importance, 
@@ -48,24 +48,19 @@ def main():
     )
     horizon = horizon_map[horizon_label]
 
-    broker_mode = st.sidebar.selectbox(
-        "Broker Feature Mode",
-        options=['Relative', 'Absolute'],
-        index=0
-    ).lower()
-
-    # Update config based on user selection
-    config['training']['horizon'] = horizon
-    config['training']['broker_mode'] = broker_mode
-
-    # Initialize predictor
+    # Load every horizon once; later reruns only reload horizons that were retrained
     try:
-        if st.session_state.predictor is None or \
-           st.session_state.predictor.horizon != horizon:
-            st.session_state.predictor = Predictor(horizon=horizon)
+        if st.session_state.predictor is None:
+            st.session_state.predictor = MultiPredictor()
+        else:
+            st.session_state.predictor.refresh()
     except Exception as e:
         st.error(f"Error initializing predictor: {str(e)}")
         st.stop()
+    predictor = st.session_state.predictor
+    if horizon not in predictor.horizons:
+        st.error(f"No trained model for the {horizon_label} horizon")
+        st.stop()
 
     # Main content area
     st.title("NEPSE Trading Signal Assistant")
@@ -73,8 +68,12 @@ def main():
         **Real-time trading signal predictions** based on technical indicators and broker behavior analysis.
     """)
 
-    # Get prediction
-    prediction = st.session_state.predictor.predict(symbol)
+    # Each model scores the broker feature mode it was trained on
+    broker_mode = predictor.trained_broker_mode(horizon)
+    st.sidebar.caption(f"Broker features: {broker_mode.title()} (mode the model was trained on)")
+
+    # Get predictions for every horizon in one call and show the selected one
+    prediction = predictor.predict(symbol)[horizon]
 
     # Display results
     col1, col2 = st.columns([1, 2])
@@ -93,17 +92,20 @@ def main():
 
     with col2:
         # Show feature importance
-        if 'features' in prediction and st.session_state.predictor.model:
+        if 'features' in prediction:
             features_df = pd.DataFrame([prediction['features']])
-            plot_feature_importance(st.session_state.predictor.model, features_df)
+            plot_feature_importance(predictor.predictor(horizon).model, features_df)
         
         # Show price history
-        price_data = load_features('technical')
+        try:
+            price_data = load_symbol_history(symbol)
+        except FileNotFoundError:
+            price_data = pd.DataFrame()
         plot_price_history(symbol, price_data)
 
     # Additional sections
     st.subheader("Model Information")
-    if st.session_state.predictor:
+    if predictor:
         st.write(f"**Model Version:** {prediction.get('model_version', 'Unknown')}")
         st.write(f"**Horizon:** {horizon_label}")
         st.write(f"**Broker Mode:** {broker_mode.title()}")
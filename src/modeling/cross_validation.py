@@ -0,0 +1,179 @@
+# src/modeling/cross_validation.py
+import os
+import time
+import shutil
+import tempfile
+import multiprocessing
+import numpy as np
+import pandas as pd
+from sklearn.metrics import accuracy_score, f1_score
+from sklearn.model_selection import ParameterGrid
+from sklearn.preprocessing import LabelEncoder
+from src.modeling.engines import get_engine
+from src.modeling.multi_horizon import build_shared_matrix
+from src.modeling.trainer import CLASSES
+from src.utils.config_loader import load_config
+from src.utils.logger import get_logger
+
+config = load_config()
+logger = get_logger('cross_validation', config['logs']['log_dir'])
+
+def walk_forward_folds(dates, n_folds=5, test_days=20, mode='expanding', train_days=None):
+    """Walk-forward (train, test) row indices over consecutive blocks of trading days.
+
+    Folds test on the last ``n_folds * test_days`` trading days in order. Training
+    uses every earlier day ('expanding') or the preceding ``train_days`` ('rolling').
+    """
+    dates = pd.DatetimeIndex(dates)
+    unique_dates = dates.unique().sort_values()
+    folds = []
+
+    for fold in range(n_folds):
+        test_start = len(unique_dates) - (n_folds - fold) * test_days
+        if test_start <= 0:
+            continue
+        test_dates = unique_dates[test_start:test_start + test_days]
+        train_start = max(test_start - train_days, 0) if mode == 'rolling' and train_days else 0
+        train_dates = unique_dates[train_start:test_start]
+
+        train_idx = np.flatnonzero(dates.isin(train_dates))
+        test_idx = np.flatnonzero(dates.isin(test_dates))
+        if len(train_idx) and len(test_idx):
+            folds.append((train_idx, test_idx))
+    return folds
+
+def cache_folds(X, y, folds, cache_dir):
+    """Materialize each fold's train/test matrices once as .npy files for memory-mapping"""
+    paths = []
+    for i, (train_idx, test_idx) in enumerate(folds):
+        fold_paths = {}
+        for name, values in (('X_train', X[train_idx]), ('y_train', y[train_idx]),
+                             ('X_test', X[test_idx]), ('y_test', y[test_idx])):
+            fold_paths[name] = os.path.join(cache_dir, f"fold{i}_{name}.npy")
+            np.save(fold_paths[name], np.ascontiguousarray(values))
+        paths.append(fold_paths)
+    return paths
+
+def _evaluate_fold(params, fold, fold_paths, engine_name):
+    """Fit one parameter set on one cached fold and score it (worker process)"""
+    X_train, y_train, X_test, y_test = (
+        np.load(fold_paths[name], mmap_mode='r') for name in ('X_train', 'y_train', 'X_test', 'y_test')
+    )
+    start_time = time.time()
+    engine = get_engine(engine_name)
+    model = engine.build(n_jobs=1, **params)
+    # One thread per job: the pool already runs a job per core
+    with engine.threads(1):
+        model.fit(X_train, y_train)
+        fit_time = time.time() - start_time
+        y_pred = model.predict(X_test)
+
+    return {
+        **params,
+        'fold': fold,
+        'train_rows': len(y_train),
+        'test_rows': len(y_test),
+        'accuracy': accuracy_score(y_test, y_pred),
+        'f1': f1_score(y_test, y_pred, average='weighted'),
+        'fit_time': fit_time,
+        'wall_time': time.time() - start_time
+    }
+
+def _collect_result(job, results):
+    """Append a finished job's result, logging a failed job instead of aborting the search"""
+    try:
+        results.append(job.get())
+    except Exception as e:
+        logger.error(f"CV job failed: {str(e)}")
+
+def grid_search(X, y, dates, param_grid=None, time_budget=None, workers=None):
+    """Evaluate a parameter grid across walk-forward folds in a process pool.
+
+    When the time budget runs out the worker processes are terminated, so queued
+    and running fits stop with it; failed jobs are logged and skipped. Returns the
+    per-fold results and a per-parameter summary sorted by mean F1.
+    """
+    cv_config = config.get('cv', {})
+    engine = get_engine()
+    param_grid = param_grid or cv_config.get('param_grid', {}).get(engine.name) or engine.param_grid
+    time_budget = time_budget or cv_config.get('time_budget_sec')
+    workers = workers or cv_config.get('workers') or os.cpu_count() or 1
+
+    folds = walk_forward_folds(
+        dates,
+        n_folds=cv_config.get('n_folds', 5),
+        test_days=cv_config.get('test_days', 20),
+        mode=cv_config.get('mode', 'expanding'),
+        train_days=cv_config.get('train_days')
+    )
+    if not folds:
+        logger.warning("Not enough history for walk-forward folds")
+        return pd.DataFrame(), pd.DataFrame()
+
+    cache_dir = tempfile.mkdtemp(dir=config['data']['processed_path'])
+    results = []
+    start_time = time.time()
+    try:
+        fold_paths = cache_folds(X, y, folds, cache_dir)
+        candidates = list(ParameterGrid(param_grid))
+        logger.info(f"Walk-forward CV: {len(candidates)} parameter sets x {len(folds)} folds on {workers} workers")
+
+        pool = multiprocessing.Pool(workers)
+        try:
+            jobs = [
+                pool.apply_async(_evaluate_fold, (params, i, paths, engine.name))
+                for params in candidates
+                for i, paths in enumerate(fold_paths)
+            ]
+            deadline = time.monotonic() + time_budget if time_budget else None
+            for job in jobs:
+                job.wait(None if deadline is None else max(deadline - time.monotonic(), 0))
+                if not job.ready():
+                    break
+
+            unfinished = 0
+            for job in jobs:
+                if job.ready():
+                    _collect_result(job, results)
+                else:
+                    unfinished += 1
+            if unfinished:
+                logger.warning(f"CV time budget of {time_budget}s reached; stopping {unfinished} unfinished jobs")
+        finally:
+            # Kills fits still running past the budget instead of leaving them to finish
+            pool.terminate()
+            pool.join()
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    logger.info(f"Walk-forward CV finished {len(results)} fold fits in {time.time() - start_time:.2f} seconds")
+    if not results:
+        return pd.DataFrame(), pd.DataFrame()
+
+    results = pd.DataFrame(results)
+    param_names = list(param_grid)
+    summary = results.groupby(param_names, dropna=False).agg(
+        folds=('fold', 'count'),
+        accuracy=('accuracy', 'mean'),
+        f1=('f1', 'mean'),
+        fit_time=('fit_time', 'mean')
+    ).reset_index().sort_values('f1', ascending=False)
+    return results, summary
+
+def run_cross_validation(tech_features, broker_features, targets_wide, horizon=None):
+    """Tune the current model engine for one horizon with walk-forward CV and log the results"""
+    horizon = horizon or config['training']['horizon']
+    X, labels, dates, _ = build_shared_matrix(tech_features, broker_features, targets_wide, [horizon])
+    rows = np.flatnonzero(pd.notna(labels[horizon]))
+    y = LabelEncoder().fit(CLASSES).transform(labels[horizon][rows])
+
+    results, summary = grid_search(X[rows], y, dates[rows])
+    if results.empty:
+        return results, summary
+
+    date_str = pd.Timestamp.now().strftime('%Y%m%d')
+    results_path = os.path.join(config['logs']['log_dir'], f"cv_results_{date_str}_{horizon}.csv")
+    results.to_csv(results_path, index=False)
+    logger.info(f"Best parameters for {horizon}: {summary.iloc[0].to_dict()}")
+    logger.info(f"CV results saved to {results_path}")
+    return results, summary
@@ -0,0 +1,90 @@
+# src/modeling/engines.py
+from contextlib import nullcontext
+from sklearn.ensemble import RandomForestClassifier, HistGradientBoostingClassifier
+from threadpoolctl import threadpool_limits
+from src.utils.config_loader import load_config
+
+config = load_config()
+
+class RandomForestEngine:
+    """Warm-started random forest that grows by whole trees"""
+    name = 'random_forest'
+    supports_eviction = True
+    supports_flat_export = True
+    param_grid = {'n_estimators': [100, 200], 'max_depth': [None, 10], 'min_samples_leaf': [1, 5]}
+
+    def build(self, n_jobs=-1, **params):
+        params = {'n_estimators': 100, 'class_weight': 'balanced', **params}
+        return RandomForestClassifier(
+            warm_start=True,
+            random_state=config['training']['random_state'],
+            n_jobs=n_jobs,
+            **params
+        )
+
+    def grow(self, model, n_members, seed=None):
+        # Warm start skips one draw per existing tree; once eviction holds the tree
+        # count constant, a fixed seed would give every run's new trees the same draws
+        if seed is not None:
+            model.random_state = seed
+        model.n_estimators += n_members
+
+    def n_members(self, model):
+        return len(getattr(model, 'estimators_', []))
+
+    def evict(self, model, n_members):
+        """Drop the ``n_members`` oldest trees"""
+        model.estimators_ = model.estimators_[n_members:]
+        model.n_estimators = len(model.estimators_)
+
+    def set_n_jobs(self, model, n_jobs):
+        model.n_jobs = n_jobs
+
+    def threads(self, n_jobs):
+        # Tree-level parallelism already follows n_jobs
+        return nullcontext()
+
+class HistGradientBoostingEngine:
+    """Histogram gradient boosting that grows by boosting iterations"""
+    name = 'hist_gradient_boosting'
+    # Boosting stages correct earlier ones, so they cannot be dropped independently
+    supports_eviction = False
+    supports_flat_export = False
+    param_grid = {'max_iter': [100, 200], 'learning_rate': [0.05, 0.1], 'max_leaf_nodes': [31, 63]}
+
+    def build(self, n_jobs=-1, **params):
+        params = {'max_iter': 100, 'class_weight': 'balanced', **params}
+        return HistGradientBoostingClassifier(
+            warm_start=True,
+            early_stopping=False,
+            random_state=config['training']['random_state'],
+            **params
+        )
+
+    def grow(self, model, n_members, seed=None):
+        # Warm-started boosting keeps its first seed, so ``seed`` is unused
+        model.max_iter += n_members
+
+    def n_members(self, model):
+        return getattr(model, 'n_iter_', 0)
+
+    def set_n_jobs(self, model, n_jobs):
+        # No n_jobs parameter; fit and predict run inside ``threads`` instead
+        pass
+
+    def threads(self, n_jobs):
+        """Cap the OpenMP threads this estimator would otherwise take from every core"""
+        return threadpool_limits(n_jobs if n_jobs and n_jobs > 0 else None, user_api='openmp')
+
+ENGINES = {
+    engine.name: engine
+    for engine in (RandomForestEngine(), HistGradientBoostingEngine())
+}
+
+def get_engine(name=None):
+    """Model engine selected by name or by models.current_model in config"""
+    name = name or config['models']['current_model']
+    try:
+        return ENGINES[name]
+    except KeyError:
+        raise ValueError(f"Unknown model engine '{name}'. Options: {', '.join(ENGINES)}")
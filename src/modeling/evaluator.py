@@ -7,6 +7,7 @@ import pandas as pd
 import json
 import os
 import numpy as np
+from src.modeling.feature_matrix import as_matrix
 from src.utils.config_loader import load_config
 from src.utils.logger import get_logger
 
@@ -18,7 +19,7 @@ def evaluate_model(model, le, X_test, y_test):
     if X_test is None or y_test is None:
         return None
         
-    y_pred = model.predict(X_test)
+    y_pred = model.predict(as_matrix(X_test))
     
     # Decode labels
     y_test_decoded = le.inverse_transform(y_test)
@@ -67,7 +68,7 @@ def log_evaluation(metrics, training_time, horizon):
     # Save to JSON
     log_dir = config['logs']['log_dir']
     date_str = pd.Timestamp.now().strftime('%Y%m%d')
-    json_path = os.path.join(log_dir, f"eval_{date_str}.json")
+    json_path = os.path.join(log_dir, f"eval_{date_str}_{horizon}.json")
     
     with open(json_path, 'w') as f:
         json.dump(log_entry, f, indent=2)
@@ -98,7 +99,7 @@ def log_evaluation(metrics, training_time, horizon):
     history.to_csv(csv_path, index=False)
     
     # Save classification report
-    report_path = os.path.join(log_dir, f"class_report_{date_str}.csv")
+    report_path = os.path.join(log_dir, f"class_report_{date_str}_{horizon}.csv")
     report_df.to_csv(report_path, index=False)
     
     logger.info(f"Evaluation results logged to {json_path} and {csv_path}")
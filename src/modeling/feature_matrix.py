@@ -0,0 +1,78 @@
+# src/modeling/feature_matrix.py
+import numpy as np
+import pandas as pd
+from src.processing.data_loader import training_window_cutoff
+from src.utils.config_loader import load_config
+
+config = load_config()
+
+KEY_COLUMNS = ['Date', 'Symbol']
+
+def apply_training_window(full_data, latest_date=None):
+    """Keep only rows inside the configured training window ending at ``latest_date``.
+
+    Pass the latest feature date: the latest labelled date lags it by the
+    horizon, and the window must start where raw file selection started it.
+    """
+    latest_date = full_data['Date'].max() if latest_date is None else latest_date
+    cutoff = training_window_cutoff(latest_date)
+    if cutoff is not None:
+        full_data = full_data[full_data['Date'] > cutoff]
+    return full_data
+
+def as_matrix(X):
+    """C-contiguous float32 view of a feature matrix, copying only when needed"""
+    if isinstance(X, pd.DataFrame):
+        X = X.to_numpy(dtype=np.float32)
+    return np.ascontiguousarray(X, dtype=np.float32)
+
+class FeatureMatrix:
+    """Float32 feature matrix with its (Date, Symbol) row keys and column schema.
+
+    Rows are sorted by (Date, Symbol) and ``X`` is C-contiguous float32, the
+    layout the tree models use internally, so fit and predict need no copies.
+    """
+
+    def __init__(self, X, columns, dates, symbols, targets=None):
+        self.X = X
+        self.columns = list(columns)
+        self.dates = dates
+        self.symbols = symbols
+        self.targets = targets or {}
+
+    def __len__(self):
+        return len(self.X)
+
+    @classmethod
+    def build(cls, tech_features, broker_features, targets=None, target_columns=(),
+              columns=None, training_window=False, dropna=False):
+        """Merge feature frames (and targets) once and lay them out as a float32 matrix.
+
+        ``columns`` fixes the schema: missing columns are zero-filled and extra
+        ones ignored, so a model always sees the columns it was trained on.
+        """
+        latest_date = tech_features['Date'].max()
+        data = pd.merge(tech_features, broker_features, on=KEY_COLUMNS)
+        if columns is None:
+            columns = [col for col in data.columns if col not in KEY_COLUMNS]
+        if targets is not None:
+            data = pd.merge(data, targets[KEY_COLUMNS + list(target_columns)], on=KEY_COLUMNS)
+        if training_window:
+            data = apply_training_window(data, latest_date)
+        if dropna:
+            data = data.dropna()
+        data = data.sort_values(KEY_COLUMNS, kind='stable')
+
+        X = np.zeros((len(data), len(columns)), dtype=np.float32)
+        for i, col in enumerate(columns):
+            if col in data.columns:
+                X[:, i] = data[col].to_numpy(dtype=np.float32, na_value=np.nan)
+        np.nan_to_num(X, copy=False, nan=0.0)
+
+        return cls(
+            X,
+            columns,
+            data['Date'].to_numpy(),
+            data['Symbol'].astype(str).to_numpy(),
+            {col: data[col].to_numpy() for col in target_columns}
+        )
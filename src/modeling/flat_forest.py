@@ -0,0 +1,133 @@
+# src/modeling/flat_forest.py
+import os
+import json
+import shutil
+import numpy as np
+from src.utils.data_manager import replace_directory
+
+FLAT_FOREST_DIR = "flat_forest"
+
+# Packed arrays, each stored as an uncompressed .npy file so it can be memory-mapped
+ARRAYS = ('roots', 'feature', 'threshold', 'left', 'right', 'missing_left', 'values', 'is_leaf', 'classes')
+
+class FlatForest:
+    """Random forest packed into flat node arrays with a vectorized NumPy traversal.
+
+    Every tree's nodes live in one set of arrays indexed by global node id, so all
+    (tree, row) pairs descend together one level per step, and pairs drop out of
+    the active set as they reach a leaf. There are no per-tree Python calls.
+    Loaded exports are memory-mapped, so every process scoring the same model
+    shares one copy of the arrays in the page cache.
+    """
+
+    def __init__(self, roots, feature, threshold, left, right, missing_left, values,
+                 classes, model_version=None, is_leaf=None):
+        self.roots = roots
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.missing_left = missing_left
+        self.values = values
+        self.classes_ = classes
+        self.model_version = model_version
+        self.is_leaf = left == np.arange(len(left)) if is_leaf is None else is_leaf
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @classmethod
+    def from_model(cls, model, model_version=None):
+        """Pack a fitted RandomForestClassifier's trees into flat arrays"""
+        trees = [estimator.tree_ for estimator in model.estimators_]
+        sizes = np.array([tree.node_count for tree in trees])
+        offsets = np.r_[0, np.cumsum(sizes)[:-1]]
+
+        feature = np.concatenate([tree.feature for tree in trees]).astype(np.int32)
+        threshold = np.concatenate([tree.threshold for tree in trees]).astype(np.float64)
+        left = np.concatenate([tree.children_left + offset for tree, offset in zip(trees, offsets)])
+        right = np.concatenate([tree.children_right + offset for tree, offset in zip(trees, offsets)])
+        missing_left = np.concatenate([
+            getattr(tree, 'missing_go_to_left', np.zeros(tree.node_count, dtype=np.uint8))
+            for tree in trees
+        ]).astype(bool)
+
+        # Per-node class distribution, normalized the way DecisionTreeClassifier does
+        values = np.concatenate([tree.value[:, 0, :model.n_classes_] for tree in trees]).astype(np.float64)
+        totals = values.sum(axis=1, keepdims=True)
+        totals[totals == 0] = 1
+        values /= totals
+
+        # Leaves loop back to themselves, so a stray step can never leave them
+        leaf = feature < 0
+        nodes = np.arange(len(feature))
+        left[leaf] = nodes[leaf]
+        right[leaf] = nodes[leaf]
+        feature[leaf] = 0
+
+        return cls(offsets.astype(np.int64), feature, threshold, left.astype(np.int64),
+                   right.astype(np.int64), missing_left, values, np.asarray(model.classes_),
+                   model_version)
+
+    def apply(self, X):
+        """Leaf node id of every (tree, row) pair, shape (n_trees, n_rows)"""
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        n_rows, n_features = X.shape
+        flat_X = X.ravel()
+        nodes = np.repeat(self.roots, n_rows)
+        row_offsets = np.tile(np.arange(n_rows, dtype=np.int64) * n_features, self.n_trees)
+
+        active = np.flatnonzero(~self.is_leaf[nodes])
+        while len(active):
+            node = nodes[active]
+            x = flat_X[row_offsets[active] + self.feature[node]]
+            go_left = np.where(np.isnan(x), self.missing_left[node], x <= self.threshold[node])
+            node = np.where(go_left, self.left[node], self.right[node])
+            nodes[active] = node
+            active = active[~self.is_leaf[node]]
+        return nodes.reshape(self.n_trees, n_rows)
+
+    def predict_proba(self, X):
+        """Mean of the trees' leaf class distributions, as RandomForestClassifier.predict_proba"""
+        return self.values[self.apply(X)].sum(axis=0) / self.n_trees
+
+    def predict(self, X):
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+    @property
+    def classes(self):
+        return self.classes_
+
+    def save(self, path):
+        """Save each packed array as an uncompressed .npy file in directory ``path``.
+
+        The directory is written under a temporary name and swapped in whole,
+        so readers never see a partial export.
+        """
+        tmp_dir = f"{path}.tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        for name in ARRAYS:
+            np.save(os.path.join(tmp_dir, f"{name}.npy"), getattr(self, name))
+        with open(os.path.join(tmp_dir, "forest.json"), 'w') as f:
+            json.dump({'model_version': self.model_version}, f)
+        replace_directory(tmp_dir, path)
+
+    @classmethod
+    def load(cls, path, mmap_mode='r'):
+        """Open an exported forest, memory-mapping its arrays unless ``mmap_mode`` is None"""
+        with open(os.path.join(path, "forest.json"), 'r') as f:
+            info = json.load(f)
+        arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode) for name in ARRAYS}
+        return cls(model_version=info.get('model_version'), **arrays)
+
+def flat_forest_path(model_path):
+    """Directory of the flat export stored beside a model artifact"""
+    return os.path.join(os.path.dirname(model_path), FLAT_FOREST_DIR)
+
+def export_flat_forest(model, model_path, model_version=None):
+    """Write the flat-array export of a forest beside its model artifact"""
+    forest = FlatForest.from_model(model, model_version)
+    forest.save(flat_forest_path(model_path))
+    return forest
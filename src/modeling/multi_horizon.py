@@ -0,0 +1,105 @@
+# src/modeling/multi_horizon.py
+import os
+import time
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from src.modeling.trainer import IncrementalTrainer
+from src.modeling.evaluator import evaluate_model
+from src.modeling.feature_matrix import FeatureMatrix
+from src.utils.config_loader import load_config
+from src.utils.logger import get_logger
+
+config = load_config()
+logger = get_logger('multi_horizon', config['logs']['log_dir'])
+
+def core_budget():
+    """Cores available to training (training.core_budget, -1 = all cores)"""
+    budget = config['training'].get('core_budget', -1)
+    if budget is None or budget < 0:
+        return os.cpu_count() or 1
+    return max(int(budget), 1)
+
+def build_shared_matrix(tech_features, broker_features, targets_wide, horizons):
+    """Merge features with every horizon's targets once and build one float32 matrix"""
+    matrix = FeatureMatrix.build(
+        tech_features, broker_features, targets_wide,
+        target_columns=[f"Target_{horizon}" for horizon in horizons], training_window=True
+    )
+    labels = {horizon: matrix.targets[f"Target_{horizon}"] for horizon in horizons}
+    return matrix.X, labels, matrix.dates, matrix.columns
+
+def _train_horizon(horizon, matrix_path, labels, dates, feature_columns, n_jobs, feature_key):
+    """Train one horizon's model on the shared memory-mapped feature matrix (worker process)"""
+    X = np.load(matrix_path, mmap_mode='r')
+    trainer = IncrementalTrainer(horizon=horizon, n_jobs=n_jobs)
+    positions = None
+    if trainer.feature_columns and trainer.feature_columns != feature_columns:
+        # An existing model keeps the column schema it was trained on
+        trainer.check_feature_columns(feature_columns)
+        positions = [feature_columns.index(col) for col in trainer.feature_columns]
+    else:
+        trainer.feature_columns = feature_columns
+
+    # Labelled rows after this horizon's training watermark
+    keep = pd.notna(labels)
+    cutoff = trainer.training_cutoff()
+    if cutoff is not None:
+        keep &= dates > cutoff.to_datetime64()
+    rows = np.flatnonzero(keep)
+    if len(rows) < 2:
+        return horizon, None, None
+
+    y = trainer.le.transform(labels[rows])
+    X = X[rows] if positions is None else np.ascontiguousarray(X[rows][:, positions])
+    X_train, X_test, y_train, y_test = trainer.split(X, y)
+    trained_through = dates[rows[:len(X_train)]].max()
+
+    training_duration = trainer.fit(X_train, y_train, feature_key, trained_through)
+    if training_duration is None:
+        return horizon, None, None
+    with trainer.engine.threads(n_jobs):
+        metrics = evaluate_model(trainer.model, trainer.le, X_test, y_test)
+    return horizon, metrics, training_duration
+
+def train_all_horizons(tech_features, broker_features, targets_wide, horizons=None, feature_key=None):
+    """Train every horizon concurrently from one shared, read-only feature matrix.
+
+    The matrix is written once to a .npy file and memory-mapped by each worker.
+    Forest n_jobs is split across workers so the core budget is not oversubscribed.
+    """
+    horizons = horizons or config['training'].get('horizons', ['next_day', '3day', 'weekly'])
+    X, labels, dates, feature_columns = build_shared_matrix(tech_features, broker_features, targets_wide, horizons)
+    if len(X) == 0:
+        logger.error("No training data available")
+        return {}
+
+    budget = core_budget()
+    workers = min(len(horizons), budget)
+    n_jobs = max(budget // workers, 1)
+    logger.info(f"Training {len(horizons)} horizons with {workers} workers x {n_jobs} jobs on {X.shape} matrix")
+
+    tmp_dir = tempfile.mkdtemp(dir=config['data']['processed_path'])
+    results = {}
+    try:
+        matrix_path = os.path.join(tmp_dir, "features.npy")
+        np.save(matrix_path, X)
+        del X
+
+        start_time = time.time()
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(_train_horizon, horizon, matrix_path, labels[horizon],
+                                dates, feature_columns, n_jobs, feature_key)
+                for horizon in horizons
+            ]
+            for future in futures:
+                horizon, metrics, training_duration = future.result()
+                results[horizon] = (metrics, training_duration)
+        logger.info(f"Trained {len(horizons)} horizons in {time.time() - start_time:.2f} seconds")
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    return results
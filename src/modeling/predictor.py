@@ -1,112 +1,471 @@
 import pandas as pd
 import numpy as np
-import joblib
 import os
+import copy
+import threading
+from collections import OrderedDict
 from datetime import datetime
+from sklearn.preprocessing import LabelEncoder
+from src.modeling.engines import get_engine
+from src.modeling.feature_matrix import FeatureMatrix
+from src.modeling.flat_forest import FlatForest, flat_forest_path
+from src.modeling.trainer import CLASSES, model_path, model_exists, load_model_artifact
+from src.processing.target_generator import HORIZONS
 from src.utils.config_loader import load_config
-from src.utils.data_manager import load_features
+from src.utils.data_manager import (
+    load_features, load_feature_manifest, load_signals, save_signals, load_model_metadata,
+    feature_set_version
+)
 from src.utils.logger import get_logger
 
 config = load_config()
 logger = get_logger('predictor')
 
+class PredictionCache:
+    """Thread-safe least-recently-used cache (prediction results, feature indexes)"""
+
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self.lock:
+            result = self.entries.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def put(self, key, result):
+        with self.lock:
+            self.entries[key] = result
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+class ModelCache:
+    """Process-wide cache of model metadata and models, invalidated when the saved model version changes"""
+
+    def __init__(self):
+        self.entries = {}
+        self.lock = threading.Lock()
+
+    def get(self, horizon, engine=None, load_model=True):
+        """(model, metadata) for a horizon, checking only the small metadata file when cached.
+
+        With ``load_model=False`` only the metadata is read and the model is None
+        unless already cached; the flat backend scores without it.
+        """
+        path = model_path(horizon, engine)
+        try:
+            metadata = load_model_metadata(path)
+        except FileNotFoundError:
+            metadata = None
+        version = metadata.get('model_version') if metadata else None
+
+        with self.lock:
+            entry = self.entries.get(path)
+            if entry is None or version is None or entry['version'] != version:
+                entry = {'version': version, 'metadata': metadata, 'model': None}
+                self.entries[path] = entry
+            # Legacy pickled models carry their metadata inside the artifact
+            if entry['model'] is None and (load_model or entry['metadata'] is None):
+                entry['model'], entry['metadata'] = load_model_artifact(horizon, engine)
+                logger.info(f"Loaded {horizon} model version {entry['metadata'].get('model_version')} from {path}")
+            return entry['model'], entry['metadata']
+
+# Shared by every Predictor in the process; keys carry the model version, feature date and broker mode
+prediction_cache = PredictionCache(config.get('serving', {}).get('prediction_cache_size', 4096))
+model_cache = ModelCache()
+# Keys carry the feature set version, so a new feature set never reuses an old index
+feature_indexes = PredictionCache(config.get('serving', {}).get('feature_index_cache_size', 8))
+_feature_indexes_lock = threading.Lock()
+
+class FeatureIndex:
+    """Latest feature rows of one feature set and broker mode, indexed by symbol.
+
+    Built once per (feature set, broker mode, column schema) and shared by every
+    predictor that needs it: a history row range per symbol and a compact array
+    of each symbol's latest feature vector.
+    """
+
+    def __init__(self, matrix, n_columns):
+        self.matrix = matrix
+        if matrix is None or len(matrix) == 0:
+            self.index_symbols = np.array([], dtype=object)
+            self.symbol_index = {}
+            self.history_rows = np.array([], dtype=np.int64)
+            self.symbol_ranges = np.empty((0, 2), dtype=np.int64)
+            self.latest_X = np.empty((0, n_columns), dtype=np.float32)
+            self.latest_dates = np.array([], dtype='datetime64[ns]')
+            self.latest_date = None
+            return
+        
+        # Matrix rows grouped by symbol, in date order within each symbol
+        self.history_rows = np.lexsort((matrix.dates, matrix.symbols))
+        symbols = matrix.symbols[self.history_rows]
+        starts = np.flatnonzero(np.r_[True, symbols[1:] != symbols[:-1]])
+        stops = np.r_[starts[1:], len(symbols)]
+        
+        self.index_symbols = symbols[starts]
+        self.symbol_index = {symbol: i for i, symbol in enumerate(self.index_symbols)}
+        self.symbol_ranges = np.c_[starts, stops]
+        latest_rows = self.history_rows[stops - 1]
+        self.latest_X = np.ascontiguousarray(matrix.X[latest_rows])
+        self.latest_dates = matrix.dates[latest_rows]
+        self.latest_date = matrix.dates.max()
+    
+    @classmethod
+    def load(cls, key, broker_mode, columns):
+        """Load a feature set's latest month for one broker mode in the given column order"""
+        # Only the latest month's partition is read: the scored day plus recent history
+        last_date = load_feature_manifest(key).get('last_date')
+        start = pd.Timestamp(last_date).to_period('M').start_time if last_date else None
+        tech_features = load_features('technical', key, start)
+        broker_features = load_features(f"broker_{broker_mode}", key, start)
+        
+        matrix = None
+        if not tech_features.empty and not broker_features.empty:
+            matrix = FeatureMatrix.build(tech_features, broker_features, columns=columns, dropna=True)
+        return cls(matrix, len(columns))
+    
+    @property
+    def feature_date(self):
+        return pd.Timestamp(self.latest_date).strftime('%Y-%m-%d') if self.latest_date is not None else None
+    
+    def history(self, symbol):
+        """Dates and feature rows loaded for a symbol, oldest first"""
+        i = self.symbol_index.get(symbol)
+        if i is None:
+            return self.latest_dates[:0], self.latest_X[:0]
+        rows = self.history_rows[slice(*self.symbol_ranges[i])]
+        return self.matrix.dates[rows], self.matrix.X[rows]
+    
+    def current(self, symbol):
+        """Single-row latest-date feature vector of a symbol, or None"""
+        i = self.symbol_index.get(symbol)
+        if i is None or self.latest_dates[i] != self.latest_date:
+            return None
+        return self.latest_X[i:i + 1]
+    
+    def latest(self, symbols=None):
+        """Symbols and float32 feature rows of the latest date, optionally limited to ``symbols``"""
+        current = self.latest_dates == self.latest_date
+        if symbols is None:
+            positions = np.flatnonzero(current)
+        else:
+            positions = [i for i in map(self.symbol_index.get, symbols) if i is not None and current[i]]
+        return self.index_symbols[positions], self.latest_X[positions]
+
+def feature_index(key, broker_mode, columns):
+    """Shared FeatureIndex for a feature set, broker mode and column schema.
+
+    Models saved without a feature key read the latest feature set, so the
+    cache key is the version of the set actually read, not the missing key.
+    """
+    cache_key = (feature_set_version(key), broker_mode, tuple(columns))
+    with _feature_indexes_lock:
+        index = feature_indexes.get(cache_key)
+        if index is None:
+            index = FeatureIndex.load(key, broker_mode, columns)
+            feature_indexes.put(cache_key, index)
+        return index
+
 class Predictor:
-    def __init__(self, horizon=None):
+    def __init__(self, horizon=None, engine=None, broker_mode=None):
         self.horizon = horizon or config['training']['horizon']
-        self.model, self.metadata = self.load_latest_model()
-        self.le = self.metadata.get('label_encoder')
+        self.engine = engine
+        self.backend = config.get('serving', {}).get('backend', 'sklearn')
+        self._model, self.metadata = self.load_latest_model()
+        self.le = LabelEncoder().fit(self.metadata.get('classes', CLASSES))
         self.feature_columns = self.metadata.get('feature_columns', [])
-        self.features = self.load_features()
+        self.model_version = self.metadata.get('model_version') or self.metadata.get('training_date', 'unknown')
+        # A model only scores the broker features of the mode it was trained on
+        self.trained_broker_mode = self.metadata.get('broker_mode', config['training']['broker_mode'])
+        self.broker_mode = broker_mode or self.trained_broker_mode
+        if self.broker_mode != self.trained_broker_mode:
+            raise ValueError(f"{self.horizon} model was trained on {self.trained_broker_mode} broker features, "
+                             f"not {self.broker_mode}")
+        self.scorer = self.load_scorer()
+        self.features = feature_index(self.metadata.get('feature_key'), self.broker_mode, self.feature_columns)
+        self.signals = self.load_signals()
     
     def load_latest_model(self):
-        """Load the most recent model for the current horizon"""
-        model_dir = os.path.join(
-            config['models']['base_path'], 
-            'random_forest', 
-            self.horizon
-        )
-        model_path = os.path.join(model_dir, "latest_model.pkl")
-        
+        """Load the most recent model for the current horizon (shared through the model cache)"""
         try:
-            model, metadata = joblib.load(model_path)
-            logger.info(f"Loaded model from {model_path}")
-            return model, metadata
+            # The flat backend scores from the exported arrays and loads the estimator only if needed
+            return model_cache.get(self.horizon, self.engine, load_model=self.backend != 'flat')
         except (FileNotFoundError, EOFError) as e:
             logger.error(f"Error loading model: {str(e)}")
             raise
+    
+    @property
+    def model(self):
+        """The fitted estimator, loaded on first use when scoring runs on the flat arrays"""
+        if self._model is None:
+            model, metadata = model_cache.get(self.horizon, self.engine)
+            if metadata.get('model_version') != self.metadata.get('model_version'):
+                logger.warning(f"{self.horizon} model changed to version {metadata.get('model_version')} "
+                               f"since version {self.model_version} was loaded")
+            self._model = model
+        return self._model
         
-    def load_features(self):
-        """Load required features"""
-        tech_features = load_features('technical')
-        broker_features = load_features(f"broker_{config['training']['broker_mode']}")
+    def load_scorer(self):
+        """Model used for scoring: the memory-mapped flat-array forest when serving.backend is 'flat'"""
+        if self.backend != 'flat' or not get_engine(self.metadata.get('engine', self.engine)).supports_flat_export:
+            return self.model
         
-        # Merge features
-        if tech_features.empty or broker_features.empty:
+        path = flat_forest_path(model_path(self.horizon, self.engine))
+        try:
+            forest = FlatForest.load(path)
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Flat export at {path} is unreadable ({str(e)}); scoring with the sklearn model")
+            return self.model
+        # The export is written after the model, so it can briefly belong to another version
+        if forest.model_version != self.model_version:
+            logger.warning(f"Flat export at {path} is version {forest.model_version}, not "
+                           f"{self.model_version}; scoring with the sklearn model")
+            return self.model
+        return forest
+    
+    @property
+    def latest_date(self):
+        return self.features.latest_date
+    
+    @property
+    def feature_date(self):
+        return self.features.feature_date
+    
+    def load_signals(self):
+        """Precomputed signals of this model, horizon and broker mode for the latest feature date"""
+        if self.latest_date is None:
             return pd.DataFrame()
-            
-        features = pd.merge(tech_features, broker_features, on=['Date', 'Symbol'])
-        return features.dropna()
+        signals = load_signals(self.latest_date)
+        if signals.empty:
+            return signals
+        signals = signals[
+            (signals['Horizon'] == self.horizon) & (signals['Model_Version'] == self.model_version)
+            & (signals.get('Broker_Mode', self.trained_broker_mode) == self.broker_mode)
+        ]
+        return signals.set_index('Symbol')
+    
+    def history(self, symbol):
+        """Dates and feature rows loaded for a symbol, oldest first"""
+        return self.features.history(symbol)
     
     def get_current_features(self, symbol):
         """Get latest features for a specific symbol"""
-        if self.features.empty:
-            return None
-            
-        latest_date = self.features['Date'].max()
-        symbol_features = self.features[
-            (self.features['Symbol'] == symbol) & 
-            (self.features['Date'] == latest_date)
-        ]
-        
-        if symbol_features.empty:
-            logger.warning(f"No features found for {symbol} on {latest_date}")
-            return None
-        
-        # Prepare feature vector
-        feature_vector = symbol_features.drop(columns=['Date', 'Symbol'])
-        
-        # Align columns with training features
-        missing_cols = set(self.feature_columns) - set(feature_vector.columns)
-        extra_cols = set(feature_vector.columns) - set(self.feature_columns)
-        
-        for col in missing_cols:
-            feature_vector[col] = 0
-            
-        return feature_vector[self.feature_columns]
+        features = self.features.current(symbol)
+        if features is None and self.latest_date is not None:
+            logger.warning(f"No features found for {symbol} on {pd.Timestamp(self.latest_date).date()}")
+        # Single-row float32 feature vector in training column order
+        return features
     
-    def predict(self, symbol):
-        """Generate prediction for a symbol"""
-        features = self.get_current_features(symbol)
-        if features is None:
-            return {
+    def latest_features(self, symbols=None):
+        """Symbols and float32 feature rows of the latest date, optionally limited to ``symbols``"""
+        return self.features.latest(symbols)
+    
+    def score(self, X):
+        """Class probabilities plus argmax signals and confidences from one predict_proba pass"""
+        probabilities = self.scorer.predict_proba(X)
+        labels = self.le.classes_[self.scorer.classes_]
+        best = probabilities.argmax(axis=1)
+        return probabilities, labels[best], probabilities[np.arange(len(best)), best]
+    
+    def _unavailable(self, symbol, reason=None):
+        result = {
+            'symbol': symbol,
+            'signal': 'Unavailable',
+            'confidence': 0.0,
+            'timestamp': datetime.now().isoformat()
+        }
+        if reason:
+            result['reason'] = reason
+        return result
+    
+    def mode_unavailable(self, symbol, broker_mode):
+        """Unavailable result for a broker mode this model was not trained on"""
+        return self._unavailable(
+            symbol, f"{self.horizon} model was trained on {self.trained_broker_mode} broker features, not {broker_mode}"
+        )
+    
+    def _results(self, symbols, X):
+        """Prediction dicts for feature rows scored in a single batch"""
+        probabilities, signals, confidences = self.score(X)
+        labels = self.le.classes_[self.scorer.classes_].tolist()
+        timestamp = datetime.now().isoformat()
+        model_version = self.model_version
+        
+        return {
+            symbol: {
                 'symbol': symbol,
-                'signal': 'Unavailable',
-                'confidence': 0.0,
-                'timestamp': datetime.now().isoformat()
+                'signal': signal,
+                'confidence': confidence,
+                'probabilities': dict(zip(labels, probs.tolist())),
+                'features': dict(zip(self.feature_columns, row.tolist())),
+                'timestamp': timestamp,
+                'model_version': model_version,
+                'broker_mode': self.broker_mode
             }
-        
-        # Make prediction
-        prediction_encoded = self.model.predict(features)[0]
-        prediction = self.le.inverse_transform([prediction_encoded])[0]
-        
-        probabilities = self.model.predict_proba(features)[0]
-        confidence = probabilities.max()
-        
-        # Get class probabilities
-        class_probs = {
-            cls: prob for cls, prob in zip(self.le.classes_, probabilities)
+            for symbol, row, probs, signal, confidence
+            in zip(symbols, X, probabilities, signals.tolist(), confidences.tolist())
         }
-        
+    
+    def _stored_result(self, symbol, features):
+        """Prediction dict from the precomputed signal table, or None if the symbol is not in it"""
+        if symbol not in self.signals.index:
+            return None
+        row = self.signals.loc[symbol]
+        labels = self.le.classes_[self.scorer.classes_].tolist()
         return {
             'symbol': symbol,
-            'signal': prediction,
-            'confidence': confidence,
-            'probabilities': class_probs,
-            'features': features.iloc[0].to_dict(),
+            'signal': row['Signal'],
+            'confidence': float(row['Confidence']),
+            'probabilities': {label: float(row[f"Prob_{label}"]) for label in labels},
+            'features': dict(zip(self.feature_columns, features[0].tolist())),
             'timestamp': datetime.now().isoformat(),
-            'model_version': self.metadata.get('training_date', 'unknown')
+            'model_version': self.model_version,
+            'broker_mode': self.broker_mode
         }
     
-    def batch_predict(self, symbols):
-        """Predict for multiple symbols"""
-        return {symbol: self.predict(symbol) for symbol in symbols}
\ No newline at end of file
+    def predict(self, symbol):
+        """Generate prediction for a symbol, running the model only on a cache and signal table miss"""
+        return self.predict_features(symbol, self.get_current_features(symbol))
+    
+    def predict_features(self, symbol, features):
+        """Prediction for a symbol whose current feature row was already looked up"""
+        if features is None:
+            return self._unavailable(symbol)
+        
+        key = (self.model_version, self.feature_date, symbol, self.horizon, self.broker_mode)
+        result = prediction_cache.get(key)
+        if result is None:
+            result = self._stored_result(symbol, features) or self._results([symbol], features)[symbol]
+            prediction_cache.put(key, result)
+        # Callers get their own copy so mutating nested probabilities or features cannot corrupt the cache
+        return copy.deepcopy(result)
+    
+    def batch_predict(self, symbols=None):
+        """Predict the latest date for every symbol (or ``symbols``) with one predict_proba call"""
+        found, X = self.latest_features(symbols)
+        results = self._results(found, X) if len(found) else {}
+        if symbols is None:
+            return results
+        return {symbol: results.get(symbol) or self._unavailable(symbol) for symbol in symbols}
+    
+    def signal_frame(self):
+        """Latest-date signals of every symbol as a columnar table, from one predict_proba call"""
+        symbols, X = self.latest_features()
+        if len(symbols) == 0:
+            return pd.DataFrame()
+        
+        probabilities, signals, confidences = self.score(X)
+        labels = self.le.classes_[self.scorer.classes_]
+        return pd.DataFrame({
+            'Date': pd.Timestamp(self.latest_date),
+            'Symbol': symbols,
+            'Horizon': self.horizon,
+            'Broker_Mode': self.broker_mode,
+            'Signal': signals,
+            'Confidence': confidences,
+            **{f"Prob_{label}": probabilities[:, i] for i, label in enumerate(labels)},
+            'Model_Version': self.model_version
+        })
+
+class MultiPredictor:
+    """Every horizon's model and feature rows, loaded once.
+
+    Models come from the model cache and feature indexes are shared, so a
+    symbol's feature row is looked up once and reused by every horizon;
+    switching horizon is a dictionary lookup. Each model only scores the
+    broker mode it was trained on: other modes get an 'Unavailable' result.
+    ``refresh`` reloads horizons whose saved model changed since.
+    """
+
+    def __init__(self, horizons=None, engine=None):
+        self.engine = engine
+        self.requested_horizons = horizons or config['training'].get('horizons', list(HORIZONS))
+        self.predictors = {}
+        self.refresh()
+        for horizon in self.requested_horizons:
+            if horizon not in self.predictors:
+                logger.warning(f"No trained {horizon} model; it will be unavailable")
+    
+    def refresh(self):
+        """Load horizons that are new or whose saved model version changed; returns those horizons"""
+        reloaded = []
+        for horizon in self.requested_horizons:
+            if not model_exists(horizon, self.engine):
+                continue
+            current = self.predictors.get(horizon)
+            try:
+                version = load_model_metadata(model_path(horizon, self.engine)).get('model_version')
+            except FileNotFoundError:
+                # Legacy pickled models carry no separate metadata file and are never retrained in place
+                version = None
+            if current is not None and version in (None, current.model_version):
+                continue
+            self.predictors[horizon] = Predictor(horizon, self.engine)
+            reloaded.append(horizon)
+        self.horizons = [horizon for horizon in self.requested_horizons if horizon in self.predictors]
+        return reloaded
+    
+    def trained_broker_mode(self, horizon):
+        """Broker mode a horizon's model was trained on"""
+        return self.predictors[horizon].trained_broker_mode
+    
+    def serves(self, horizon, broker_mode=None):
+        """Whether a horizon's model can score ``broker_mode`` features"""
+        return broker_mode is None or broker_mode == self.trained_broker_mode(horizon)
+    
+    def predictor(self, horizon):
+        return self.predictors[horizon]
+    
+    def predict(self, symbol, broker_mode=None):
+        """Signals of every horizon for one symbol, sharing the feature lookup across horizons"""
+        rows = {}
+        results = {}
+        for horizon, predictor in self.predictors.items():
+            if not self.serves(horizon, broker_mode):
+                results[horizon] = predictor.mode_unavailable(symbol, broker_mode)
+                continue
+            index = id(predictor.features)
+            if index not in rows:
+                rows[index] = predictor.get_current_features(symbol)
+            results[horizon] = predictor.predict_features(symbol, rows[index])
+        return results
+    
+    def batch_predict(self, symbols=None, broker_mode=None):
+        """{horizon: {symbol: prediction}} with one predict_proba call per horizon"""
+        results = {}
+        for horizon, predictor in self.predictors.items():
+            if self.serves(horizon, broker_mode):
+                results[horizon] = predictor.batch_predict(symbols)
+            else:
+                requested = predictor.latest_features()[0] if symbols is None else symbols
+                results[horizon] = {symbol: predictor.mode_unavailable(symbol, broker_mode) for symbol in requested}
+        return results
+
+def precompute_signals(horizons=None):
+    """Score every symbol for every horizon with a trained model and persist the signal table"""
+    horizons = horizons or config['training'].get('horizons', list(HORIZONS))
+    frames = []
+    for horizon in horizons:
+        if not model_exists(horizon):
+            logger.info(f"No trained {horizon} model; skipping its signals")
+            continue
+        frames.append(Predictor(horizon=horizon).signal_frame())
+    
+    frames = [frame for frame in frames if not frame.empty]
+    if not frames:
+        return pd.DataFrame()
+    
+    signals = pd.concat(frames, ignore_index=True)
+    save_signals(signals)
+    logger.info(f"Saved {len(signals)} signals for {signals['Horizon'].nunique()} horizons")
+    return signals
@@ -4,72 +4,145 @@ import pandas as pd
 import numpy as np
 import time
 import os
-from sklearn.ensemble import RandomForestClassifier
+import uuid
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import LabelEncoder
+from src.modeling.engines import get_engine
+from src.modeling.flat_forest import export_flat_forest
+from src.modeling.feature_matrix import FeatureMatrix, apply_training_window, as_matrix
 from src.utils.config_loader import load_config
-from src.utils.data_manager import save_features, save_targets, save_model
+from src.utils.data_manager import save_features, save_targets, save_model, load_model
 from src.utils.logger import get_logger
 
 config = load_config()
 logger = get_logger('trainer', config['logs']['log_dir'])
 
+# Fixed label set so encodings stay stable across incremental runs
+CLASSES = ['Buy', 'Hold', 'Sell']
+
+def model_path(horizon, engine_name=None):
+    """Path of the latest model for an engine and horizon: models/<engine>/<horizon>/"""
+    model_dir = os.path.join(
+        config['models']['base_path'],
+        get_engine(engine_name).name,
+        horizon
+    )
+    return os.path.join(model_dir, "latest_model.joblib")
+
+def legacy_model_path(horizon, engine_name=None):
+    """Path of a model saved as a single pickled (model, metadata) tuple"""
+    return f"{os.path.splitext(model_path(horizon, engine_name))[0]}.pkl"
+
+def model_exists(horizon, engine_name=None):
+    return any(os.path.exists(path) for path in
+               (model_path(horizon, engine_name), legacy_model_path(horizon, engine_name)))
+
+def load_model_artifact(horizon, engine_name=None):
+    """(model, metadata) of the latest model, falling back to the legacy pickled tuple"""
+    try:
+        return load_model(model_path(horizon, engine_name))
+    except FileNotFoundError:
+        return joblib.load(legacy_model_path(horizon, engine_name))
+
+def new_model_version():
+    """Unique model version: a microsecond timestamp plus a random suffix, so two saves never share one"""
+    return f"{pd.Timestamp.now().strftime('%Y%m%dT%H%M%S%f')}-{uuid.uuid4().hex[:8]}"
+
+def measure_latency(model, X, repeats=5):
+    """Best-of predict_proba latency in ms for one row and per row of a batch"""
+    X = as_matrix(X[:1000])
+    single, batch = [], []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        model.predict_proba(X[:1])
+        single.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        model.predict_proba(X)
+        batch.append(time.perf_counter() - start)
+    return min(single) * 1000, min(batch) * 1000 / len(X)
+
 class IncrementalTrainer:
-    def __init__(self):
+    def __init__(self, horizon=None, n_jobs=-1, engine=None):
+        self.horizon = horizon or config['training']['horizon']
+        self.n_jobs = n_jobs
+        self.engine = get_engine(engine)
         self.model = None
         self.feature_columns = []
-        self.le = LabelEncoder()
+        self.le = LabelEncoder().fit(CLASSES)
+        self.watermark = None
+        self.tree_watermarks = []
+        self.trees_fitted = 0
         self.model_path = self._get_model_path()
         self.load_or_initialize_model()
         
     def _get_model_path(self):
-        horizon = config['training']['horizon']
-        model_dir = os.path.join(
-            config['models']['base_path'], 
-            'random_forest', 
-            horizon
-        )
-        return os.path.join(model_dir, "latest_model.pkl")
+        return model_path(self.horizon, self.engine.name)
     
     def load_or_initialize_model(self):
         try:
-            self.model, metadata = joblib.load(self.model_path)
+            self.model, metadata = load_model_artifact(self.horizon, self.engine.name)
             self.feature_columns = metadata.get('feature_columns', [])
+            self.watermark = metadata.get('last_trained_date')
+            # Models saved before per-tree watermarks: treat every tree as equally old
+            self.tree_watermarks = metadata.get(
+                'tree_watermarks', [self.watermark] * self.engine.n_members(self.model)
+            )
+            # Members ever fitted, evicted ones included; seeds each run's new members
+            self.trees_fitted = metadata.get('trees_fitted', self.engine.n_members(self.model))
+            self.engine.set_n_jobs(self.model, self.n_jobs)
             logger.info(f"Loaded existing model from {self.model_path}")
         except (FileNotFoundError, EOFError):
-            self.model = RandomForestClassifier(
-                n_estimators=100,
-                class_weight='balanced',
-                warm_start=True,
-                random_state=config['training']['random_state'],
-                n_jobs=-1
-            )
-            logger.info("Initialized new Random Forest model")
+            self.model = self.engine.build(n_jobs=self.n_jobs)
+            logger.info(f"Initialized new {self.engine.name} model")
+    
+    def training_cutoff(self):
+        """Only days after this date are trained on: the watermark minus the replay window"""
+        if self.watermark is None:
+            return None
+        replay_days = config['training'].get('replay_days', 0)
+        return pd.Timestamp(self.watermark) - pd.Timedelta(days=replay_days)
     
     def prepare_data(self, tech_features, broker_features, targets):
         """Prepare training and test data"""
-        # Merge datasets
-        features = pd.merge(tech_features, broker_features, on=['Date', 'Symbol'])
-        full_data = pd.merge(features, targets, on=['Date', 'Symbol'])
-        
-        # Filter based on training window
-        window = config['training']['training_window']
-        if window != 'all' and isinstance(window, int):
-            latest_date = full_data['Date'].max()
-            cutoff = latest_date - pd.Timedelta(days=window)
-            full_data = full_data[full_data['Date'] > cutoff]
+        # Keep only days after the watermark before merging
+        cutoff = self.training_cutoff()
+        if cutoff is not None:
+            tech_features = tech_features[tech_features['Date'] > cutoff]
+            broker_features = broker_features[broker_features['Date'] > cutoff]
+            targets = targets[targets['Date'] > cutoff]
+            logger.info(f"Training on days after {cutoff.date()} (watermark {self.watermark})")
         
-        # Encode targets
-        full_data['Target_Encoded'] = self.le.fit_transform(full_data['Target'])
+        # An existing model keeps the column schema it was trained on
+        columns = None
+        if self.feature_columns:
+            self.check_feature_columns(list(tech_features.columns) + list(broker_features.columns))
+            columns = self.feature_columns
         
-        # Prepare X and y
-        X = full_data.drop(columns=['Date', 'Symbol', 'Target', 'Target_Encoded'])
-        y = full_data['Target_Encoded']
-        self.feature_columns = X.columns.tolist()
+        # Merge once into a float32 matrix inside the training window
+        matrix = FeatureMatrix.build(
+            tech_features, broker_features, targets, target_columns=['Target'],
+            columns=columns, training_window=True
+        )
+        self.dates = matrix.dates
+        if len(matrix) < 2:
+            return None, None, None, None
         
-        # Handle missing values
-        X = X.fillna(0)
+        # Encode targets
+        y = self.le.transform(matrix.targets['Target'])
+        self.feature_columns = matrix.columns
         
+        return self.split(matrix.X, y)
+    
+    def check_feature_columns(self, available):
+        """Fail if the feature set lacks any column the existing model was trained on"""
+        missing = [col for col in self.feature_columns if col not in available]
+        if missing:
+            raise ValueError(
+                f"Feature set lacks columns the existing {self.horizon} model was trained on: {missing}"
+            )
+    
+    def split(self, X, y):
+        """Train/test split in row order (no shuffling)"""
         return train_test_split(
             X, y, 
             test_size=config['training']['test_size'],
@@ -77,30 +150,85 @@ class IncrementalTrainer:
             shuffle=False
         )
     
-    def train(self, tech_features, broker_features, targets):
+    def evict_oldest_trees(self):
+        """Drop the oldest trees once the forest exceeds training.max_trees"""
+        if not self.engine.supports_eviction:
+            return
+        max_trees = config['training'].get('max_trees')
+        excess = self.engine.n_members(self.model) - max_trees if max_trees else 0
+        if excess <= 0:
+            return
+        
+        # Trees are appended run by run, so list order is age order
+        self.engine.evict(self.model, excess)
+        self.tree_watermarks = self.tree_watermarks[excess:]
+        logger.info(f"Evicted {excess} oldest trees (keeping {self.engine.n_members(self.model)})")
+    
+    def train(self, tech_features, broker_features, targets, feature_key=None):
         """Train the model incrementally"""
         X_train, X_test, y_train, y_test = self.prepare_data(tech_features, broker_features, targets)
         
-        if X_train is None or X_train.empty:
-            logger.error("No training data available")
+        if X_train is None or len(X_train) == 0:
+            logger.error("No new training data available")
             return None, None, None
         
+        # The split keeps row order, so the training rows are the first ones
+        trained_through = self.dates[:len(X_train)].max()
+        training_duration = self.fit(X_train, y_train, feature_key, trained_through)
+        if training_duration is None:
+            return None, None, None
+        return X_test, y_test, training_duration
+    
+    def fit(self, X_train, y_train, feature_key=None, trained_through=None):
+        """Grow the forest with new trees fitted on the training slice and save it"""
+        # Every run's trees must see every class or the forest's probabilities misalign
+        if len(np.unique(y_train)) < len(self.le.classes_):
+            logger.warning(f"Training slice lacks some of {list(self.le.classes_)}; skipping this run")
+            return None
+        
         # Incremental training
         start_time = time.time()
-        self.model.n_estimators += 10  # Add 10 trees each training
-        self.model.fit(X_train, y_train)
+        n_before = self.engine.n_members(self.model)
+        self.engine.grow(
+            self.model, config['training'].get('trees_per_run', 10),
+            seed=config['training']['random_state'] + self.trees_fitted
+        )
+        with self.engine.threads(self.n_jobs):
+            self.model.fit(X_train, y_train)
         training_duration = time.time() - start_time
+        self.trees_fitted += self.engine.n_members(self.model) - n_before
+        
+        # Tag the new trees with the data they were fitted on, then evict the oldest
+        watermark = pd.Timestamp(trained_through).strftime('%Y-%m-%d') if trained_through is not None else self.watermark
+        self.tree_watermarks += [watermark] * (self.engine.n_members(self.model) - len(self.tree_watermarks))
+        self.evict_oldest_trees()
+        # Latency of the model as saved, after eviction
+        with self.engine.threads(self.n_jobs):
+            single_latency, batch_latency = measure_latency(self.model, X_train)
         
         # Save updated model
         metadata = {
             'feature_columns': self.feature_columns,
-            'label_encoder': self.le,
+            'classes': self.le.classes_.tolist(),
             'training_date': pd.Timestamp.now().strftime('%Y-%m-%d'),
-            'horizon': config['training']['horizon'],
-            'broker_mode': config['training']['broker_mode']
+            'model_version': new_model_version(),
+            'horizon': self.horizon,
+            'broker_mode': config['training']['broker_mode'],
+            'feature_key': feature_key,
+            'last_trained_date': watermark,
+            'tree_watermarks': self.tree_watermarks,
+            'trees_fitted': self.trees_fitted,
+            'engine': self.engine.name,
+            'train_time_sec': training_duration,
+            'predict_latency_ms_single': single_latency,
+            'predict_latency_ms_per_row': batch_latency
         }
         
-        joblib.dump((self.model, metadata), self.model_path)
+        save_model(self.model, self.model_path, metadata)
         logger.info(f"Model saved to {self.model_path}")
         
-        return X_test, y_test, training_duration
\ No newline at end of file
+        # Packed node arrays for the low-latency serving backend
+        if self.engine.supports_flat_export:
+            export_flat_forest(self.model, self.model_path, metadata['model_version'])
+        
+        return training_duration
\ No newline at end of file
@@ -0,0 +1,183 @@
+# src/processing/broker_activity.py
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+# Threshold for large block trades (NPR)
+LARGE_TRADE_VALUE = 1e6
+
+def _codes(values):
+    """Integer codes and sorted uniques for a column (categorical-aware)"""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        values = values.cat.remove_unused_categories()
+        return values.cat.codes.to_numpy(), pd.Index(values.cat.categories)
+    codes, uniques = pd.factorize(values, sort=True)
+    return codes, pd.Index(uniques)
+
+def _aligned(matrix, pattern):
+    """Values of ``matrix`` at the stored positions of ``pattern`` (both canonical CSR)"""
+    n_cols = pattern.shape[1]
+    pattern_rows = np.repeat(np.arange(pattern.shape[0]), np.diff(pattern.indptr))
+    matrix_rows = np.repeat(np.arange(matrix.shape[0]), np.diff(matrix.indptr))
+    pattern_keys = pattern_rows.astype(np.int64) * n_cols + pattern.indices
+    matrix_keys = matrix_rows.astype(np.int64) * n_cols + matrix.indices
+    values = np.zeros(pattern.nnz)
+    values[np.searchsorted(pattern_keys, matrix_keys)] = matrix.data
+    return values
+
+class BrokerActivity:
+    """Per-day sparse (symbols x brokers) buy and sell volume matrices.
+
+    Days are stacked vertically, so row ``day * n_symbols + symbol`` holds one
+    symbol's broker volumes on one day and each day is a contiguous row block.
+    """
+
+    def __init__(self, dates, symbols, buy, sell, large_trades):
+        self.dates = pd.DatetimeIndex(dates)
+        self.symbols = pd.Index(symbols)
+        self.buy = buy.tocsr()
+        self.sell = sell.tocsr()
+        self.large_trades = large_trades
+        for matrix in (self.buy, self.sell):
+            matrix.sum_duplicates()
+            matrix.sort_indices()
+
+    @property
+    def n_brokers(self):
+        return self.buy.shape[1]
+
+    @classmethod
+    def _build(cls, day, symbol, broker, is_buy, volume, dates, symbols, n_brokers, large_trades):
+        n_rows = len(dates) * len(symbols)
+        rows = day.astype(np.int64) * len(symbols) + symbol
+        valid = broker >= 0
+        shape = (n_rows, n_brokers)
+        buy = sparse.csr_matrix(
+            (volume[valid & is_buy], (rows[valid & is_buy], broker[valid & is_buy])), shape=shape
+        )
+        sell = sparse.csr_matrix(
+            (volume[valid & ~is_buy], (rows[valid & ~is_buy], broker[valid & ~is_buy])), shape=shape
+        )
+        return cls(dates, symbols, buy, sell, large_trades)
+
+    @classmethod
+    def from_trades(cls, df):
+        """Build the matrices straight from integer-coded trade arrays"""
+        day, dates = _codes(df['Date'])
+        symbol, symbols = _codes(df['Symbol'])
+        is_buy = df['Is_Buy'].to_numpy(dtype=bool)
+        buyer = df['BuyerBroker'].to_numpy(dtype=np.float64, na_value=np.nan)
+        seller = df['SellerBroker'].to_numpy(dtype=np.float64, na_value=np.nan)
+        broker = np.where(is_buy, buyer, seller)
+        broker = np.where(np.isnan(broker), -1, broker).astype(np.int64)
+        volume = df['Quantity'].to_numpy(dtype=np.float64)
+
+        # Large block trades per stacked (day, symbol) row
+        rows = day.astype(np.int64) * len(symbols) + symbol
+        large = volume * df['Rate'].to_numpy(dtype=np.float64) > LARGE_TRADE_VALUE
+        large_trades = np.bincount(rows[large], minlength=len(dates) * len(symbols))
+
+        return cls._build(day, symbol, broker, is_buy, volume, dates, symbols,
+                          int(broker.max()) + 1 if len(broker) else 0, large_trades)
+
+    @classmethod
+    def from_activity(cls, broker_activity, large_trades):
+        """Build the matrices from aggregated (Date, Symbol, Broker) buy/sell volumes"""
+        day, dates = _codes(broker_activity['Date'])
+        symbol, symbols = _codes(broker_activity['Symbol'].astype(str))
+        broker = broker_activity['Broker'].to_numpy(dtype=np.int64)
+        n_brokers = int(broker.max()) + 1 if len(broker) else 0
+
+        buy = broker_activity['Buy_Volume'].to_numpy(dtype=np.float64)
+        sell = broker_activity['Sell_Volume'].to_numpy(dtype=np.float64)
+        both = np.r_[day, day], np.r_[symbol, symbol], np.r_[broker, broker]
+        is_buy = np.r_[np.ones(len(buy), dtype=bool), np.zeros(len(sell), dtype=bool)]
+
+        counts = np.zeros(len(dates) * len(symbols))
+        if not large_trades.empty:
+            large_day = dates.get_indexer(large_trades['Date'])
+            large_symbol = symbols.get_indexer(large_trades['Symbol'].astype(str))
+            known = (large_day >= 0) & (large_symbol >= 0)
+            rows = large_day[known].astype(np.int64) * len(symbols) + large_symbol[known]
+            np.add.at(counts, rows, large_trades['Large_Trades_Count'].to_numpy()[known])
+
+        return cls._build(*both, is_buy, np.r_[buy, sell], dates, symbols, n_brokers, counts)
+
+    def day(self, date):
+        """(buy, sell) symbols x brokers matrices for one trading day"""
+        d = self.dates.get_loc(pd.Timestamp(date))
+        block = slice(d * len(self.symbols), (d + 1) * len(self.symbols))
+        return self.buy[block], self.sell[block]
+
+    def volume_between(self, start=None, end=None):
+        """(buy, sell) symbols x brokers volumes summed over a date range"""
+        days = np.flatnonzero(
+            (self.dates >= pd.Timestamp(start or self.dates.min()))
+            & (self.dates <= pd.Timestamp(end or self.dates.max()))
+        )
+        # Fold the selected day blocks onto one symbols x brokers matrix
+        rows = (days[:, None] * len(self.symbols) + np.arange(len(self.symbols))).ravel()
+        fold = sparse.csr_matrix(
+            (np.ones(len(rows)), (np.tile(np.arange(len(self.symbols)), len(days)), rows)),
+            shape=(len(self.symbols), self.buy.shape[0])
+        )
+        return fold @ self.buy, fold @ self.sell
+
+    def to_frame(self):
+        """Long (Date, Symbol, Broker, Buy_Volume, Sell_Volume) frame of non-zero activity"""
+        total = (self.buy + self.sell).tocsr()
+        total.sort_indices()
+        rows = np.repeat(np.arange(total.shape[0]), np.diff(total.indptr))
+        return pd.DataFrame({
+            'Date': self.dates[rows // len(self.symbols)],
+            'Symbol': pd.Categorical.from_codes(rows % len(self.symbols), self.symbols),
+            'Broker': total.indices.astype(np.int16),
+            'Buy_Volume': _aligned(self.buy, total),
+            'Sell_Volume': _aligned(self.sell, total)
+        })
+
+    def features(self, modes=('relative', 'absolute'), top_n=3):
+        """Per-(Date, Symbol) broker features for each mode via sparse row reductions"""
+        total = (self.buy + self.sell).tocsr()
+        net = (self.buy - self.sell).tocsr()
+        net.eliminate_zeros()
+
+        # Relative strength: net / (buy + sell + 1e-6) on net's pattern
+        inverse_total = total.copy()
+        inverse_total.data = 1.0 / (inverse_total.data + 1e-6)
+        strengths = {
+            'relative': abs(net.multiply(inverse_total).tocsr()),
+            'absolute': abs(net)
+        }
+
+        broker_count = np.diff(total.indptr)
+        active = np.flatnonzero(broker_count > 0)
+        base = pd.DataFrame({
+            'Date': self.dates[active // len(self.symbols)],
+            'Symbol': pd.Categorical.from_codes(active % len(self.symbols), self.symbols)
+        })
+
+        features = {}
+        for mode in modes:
+            strength = strengths[mode]
+            strength.sort_indices()
+            row_total = np.asarray(strength.sum(axis=1)).ravel()
+            with np.errstate(invalid='ignore', divide='ignore'):
+                hhi = np.asarray(strength.power(2).sum(axis=1)).ravel() / row_total ** 2
+                top_share = self._top_n_sum(strength, top_n) / row_total
+            mode_features = base.copy()
+            mode_features['Broker_HHI'] = np.nan_to_num(hhi[active])
+            mode_features['Top_Brokers_Share'] = np.nan_to_num(top_share[active])
+            mode_features['Broker_Count'] = broker_count[active]
+            mode_features['Large_Trades_Count'] = self.large_trades[active].astype(float)
+            features[mode] = mode_features
+        return features
+
+    @staticmethod
+    def _top_n_sum(matrix, top_n):
+        """Sum of the ``top_n`` largest stored values in each row"""
+        rows = np.repeat(np.arange(matrix.shape[0]), np.diff(matrix.indptr))
+        order = np.lexsort((-matrix.data, rows))
+        rank = np.arange(len(order)) - matrix.indptr[rows[order]]
+        top = order[rank < top_n]
+        return np.bincount(rows[top], weights=matrix.data[top], minlength=matrix.shape[0])
@@ -2,64 +2,324 @@
 import pandas as pd
 import os
 import numpy as np
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
 from glob import glob
+from src.processing.indicators import LOOKBACK
 from src.utils.config_loader import load_config
+from src.utils.data_manager import (
+    save_raw_partition, load_raw_partition, raw_partition_exists,
+    load_raw_manifest, save_raw_manifest
+)
 from src.utils.logger import get_logger
 
 config = load_config()
 logger = get_logger('data_loader', config['logs']['log_dir'])
 
-def load_raw_data():
-    """Load and concatenate all raw CSV files"""
-    raw_files = glob(os.path.join(config['data']['raw_path'], 'floor_sheet_data_*.csv'))
-    
-    if not raw_files:
-        logger.warning("No raw data files found")
-        return pd.DataFrame()
-    
-    dfs = []
-    
-    for file in raw_files:
-        try:
-            # Extract date from filename
-            date_str = os.path.basename(file).split('_')[-1].replace('.csv', '')
-            df = pd.read_csv(file)
-            df['Date'] = pd.to_datetime(date_str)
-            dfs.append(df)
-        except Exception as e:
-            logger.error(f"Error loading {file}: {str(e)}")
-    
-    if not dfs:
-        return pd.DataFrame()
-    
-    full_df = pd.concat(dfs).sort_values('Date')
-    
-    # Data cleaning
-    full_df = full_df.dropna(subset=['Symbol', 'Rate', 'Quantity'])
- # Clean Quantity column - remove commas and convert to int
-    def clean_quantity(value):
-        if isinstance(value, str):
-            return int(value.replace(',', ''))
-        return int(value)
-    
-    full_df['Quantity'] = full_df['Quantity'].apply(clean_quantity)
-    
+# Columns are read as strings where the floor sheet uses thousands separators
+RAW_DTYPES = {
+    'Symbol': str,
+    'Quantity': str,
+    'Rate': str,
+    'Amount': str
+}
+
+# Compact in-memory schema for cleaned trades (after the Buyer/Seller rename)
+TRADE_SCHEMA = {
+    'SN': 'int32',
+    'Symbol': 'category',
+    'BuyerBroker': 'Int16',
+    'SellerBroker': 'Int16',
+    'Quantity': 'int32',
+    'Rate': 'float32',
+    'Amount': 'float64',
+    'Is_Buy': 'bool'
+}
+
+# Bump when the cleaned partition layout changes so cached partitions are rebuilt
+RAW_CACHE_VERSION = 2
+
+def _file_date(file):
+    """Extract trading date from a floor sheet filename"""
+    return os.path.basename(file).split('_')[-1].replace('.csv', '')
+
+def _to_number(series):
+    """Vectorized numeric conversion that strips thousands separators"""
+    if pd.api.types.is_numeric_dtype(series):
+        return series
+    return pd.to_numeric(series.str.replace(',', '', regex=False), errors='coerce')
+
+def _read_csv(file):
+    """Read a floor sheet with the fastest available CSV engine"""
+    try:
+        return pd.read_csv(file, engine='pyarrow', dtype=RAW_DTYPES)
+    except (ImportError, ValueError):
+        return pd.read_csv(file, dtype=RAW_DTYPES)
+
+def _apply_trade_schema(df):
+    """Cast trade columns to the compact TRADE_SCHEMA dtypes"""
+    dtypes = {col: dtype for col, dtype in TRADE_SCHEMA.items() if col in df.columns}
+    return df.astype(dtypes)
+
+def _clean_floor_sheet(df):
+    """Clean one floor sheet using vectorized conversions only"""
+    df = df.dropna(subset=['Symbol', 'Rate', 'Quantity'])
+
+    # Clean Quantity column - remove commas and convert to int
+    df['Quantity'] = _to_number(df['Quantity'])
+
     # Clean Rate column
-    full_df['Rate'] = full_df['Rate'].astype(float)
-    
+    df['Rate'] = _to_number(df['Rate'])
+
     # Handle amount formatting
-    if 'Amount' in full_df.columns:
-        full_df['Amount'] = full_df['Amount'].str.replace(',', '').astype(float)
-    
+    if 'Amount' in df.columns:
+        df['Amount'] = _to_number(df['Amount'])
+
     # Rename columns for clarity
     column_map = {
         'Buyer': 'BuyerBroker',
         'Seller': 'SellerBroker'
     }
-    full_df = full_df.rename(columns={k: v for k, v in column_map.items() if k in full_df.columns})
-    
-    # Create buy/sell flags
-    full_df['Trade_Type'] = np.where(full_df['BuyerBroker'].notna(), 'Buy', 'Sell')
-    
+    df = df.rename(columns={k: v for k, v in column_map.items() if k in df.columns})
+
+    # Create buy/sell flag
+    df['Is_Buy'] = df['BuyerBroker'].notna()
+
+    return _apply_trade_schema(df)
+
+def _concat_trades(dfs):
+    """Concatenate daily trades, unifying categories so Symbol stays categorical"""
+    symbols = pd.api.types.union_categoricals(
+        [df['Symbol'] for df in dfs], ignore_order=True
+    ).categories.sort_values()
+    for df in dfs:
+        df['Symbol'] = df['Symbol'].cat.set_categories(symbols)
+    return pd.concat(dfs)
+
+def log_memory_usage(df, name='trades'):
+    """Log the in-memory footprint of a DataFrame per column"""
+    usage = df.memory_usage(deep=True, index=False)
+    columns = ', '.join(f"{col}={usage[col] / 1e6:.1f}MB" for col in usage.index)
+    logger.info(f"Memory usage of {name}: {usage.sum() / 1e6:.1f}MB ({columns})")
+
+def read_floor_sheet_chunks(file, chunksize):
+    """Yield cleaned chunks of a single floor sheet without reading it whole"""
+    date = pd.to_datetime(_file_date(file))
+    for chunk in pd.read_csv(file, dtype=RAW_DTYPES, chunksize=chunksize):
+        chunk['Date'] = date
+        yield _clean_floor_sheet(chunk)
+
+def _read_floor_sheet(file):
+    """Read and clean a single floor sheet (runs in worker processes)"""
+    df = _read_csv(file)
+    df['Date'] = pd.to_datetime(_file_date(file))
+    return _clean_floor_sheet(df)
+
+def ingest_workers():
+    """Number of ingest worker processes from config (0/1 = sequential, -1 = all cores)"""
+    workers = config['data'].get('ingest_workers', 1)
+    if workers is None or workers < 0:
+        return os.cpu_count() or 1
+    return max(int(workers), 1)
+
+def _read_floor_sheets(files):
+    """Read floor sheets sequentially or across a process pool"""
+    workers = min(ingest_workers(), len(files))
+    sheets = {}
+
+    if workers <= 1:
+        for file in files:
+            try:
+                sheets[file] = _read_floor_sheet(file)
+            except Exception as e:
+                logger.error(f"Error loading {file}: {str(e)}")
+        return sheets
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [(file, executor.submit(_read_floor_sheet, file)) for file in files]
+        for file, future in futures:
+            try:
+                sheets[file] = future.result()
+            except Exception as e:
+                logger.error(f"Error loading {file}: {str(e)}")
+    return sheets
+
+def _file_hash(file):
+    """SHA-256 of a raw file's contents"""
+    digest = hashlib.sha256()
+    with open(file, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _is_unchanged(file, entry):
+    """Check a raw file against its manifest entry, hashing only when size/mtime moved"""
+    stat = os.stat(file)
+    if entry is None or entry.get('version') != RAW_CACHE_VERSION or entry['size'] != stat.st_size:
+        return False
+    if entry['mtime'] == stat.st_mtime:
+        return True
+    if entry['sha256'] == _file_hash(file):
+        entry['mtime'] = stat.st_mtime
+        return True
+    return False
+
+def _load_with_cache(files):
+    """Load floor sheets, parsing only files that are new or changed since the last run"""
+    manifest = load_raw_manifest()
+    cached, stale = [], []
+
+    for file in files:
+        name = os.path.basename(file)
+        if _is_unchanged(file, manifest.get(name)) and raw_partition_exists(_file_date(file)):
+            cached.append(file)
+        else:
+            stale.append(file)
+
+    sheets = _read_floor_sheets(stale) if stale else {}
+    for file, df in sheets.items():
+        stat = os.stat(file)
+        save_raw_partition(df, _file_date(file))
+        manifest[os.path.basename(file)] = {
+            'size': stat.st_size,
+            'mtime': stat.st_mtime,
+            'sha256': _file_hash(file),
+            'version': RAW_CACHE_VERSION,
+            'symbols': sorted(map(str, df['Symbol'].dropna().unique()))
+        }
+
+    for file in cached:
+        try:
+            sheets[file] = _apply_trade_schema(load_raw_partition(_file_date(file)))
+        except Exception as e:
+            logger.error(f"Error loading cached partition for {file}: {str(e)}")
+
+    # Forget files that are no longer in the raw directory
+    present = {os.path.basename(file) for file in list_raw_files()}
+    manifest = {name: entry for name, entry in manifest.items() if name in present}
+    save_raw_manifest(manifest)
+
+    logger.info(f"Raw cache: {len(cached)} cached, {len(sheets) - len(cached)} parsed")
+    return sheets
+
+def data_watermark(files=None):
+    """Digest of the raw input data (file names and content hashes), reusing manifest hashes"""
+    files = training_files() if files is None else files
+    manifest = load_raw_manifest()
+    digest = hashlib.sha256()
+    for file in files:
+        name = os.path.basename(file)
+        entry = manifest.get(name)
+        file_hash = entry['sha256'] if _is_unchanged(file, entry) else _file_hash(file)
+        digest.update(f"{name}:{file_hash}\n".encode())
+    return digest.hexdigest()
+
+def list_raw_files():
+    """List raw floor sheet files in date order"""
+    return sorted(
+        glob(os.path.join(config['data']['raw_path'], 'floor_sheet_data_*.csv')),
+        key=_file_date
+    )
+
+def files_after(files, date):
+    """Raw files of trading days after ``date``"""
+    date = pd.Timestamp(date)
+    return [file for file in files if pd.Timestamp(_file_date(file)) > date]
+
+def training_window_cutoff(latest_date):
+    """Start of training.training_window ending at ``latest_date``; later rows are inside it.
+
+    None for an 'all' window. Raw file selection and the training matrix both cut here.
+    """
+    window = config['training']['training_window']
+    if window == 'all' or not isinstance(window, int) or pd.isna(latest_date):
+        return None
+    return pd.Timestamp(latest_date) - pd.Timedelta(days=window)
+
+def window_cutoff(files=None):
+    """Training window cutoff for a list of raw files (None for an 'all' window)"""
+    files = list_raw_files() if files is None else files
+    return training_window_cutoff(_file_date(files[-1])) if files else None
+
+def _file_symbols(file, manifest):
+    """Symbols traded in a raw file, from the raw cache when the file is unchanged"""
+    entry = manifest.get(os.path.basename(file))
+    if entry is not None and _is_unchanged(file, entry):
+        if 'symbols' in entry:
+            return set(entry['symbols'])
+        if raw_partition_exists(_file_date(file)):
+            return set(load_raw_partition(_file_date(file), columns=['Symbol'])['Symbol'].dropna().astype(str))
+    return set(pd.read_csv(file, usecols=['Symbol'], dtype=str)['Symbol'].dropna())
+
+def training_files(files=None, lookback=LOOKBACK):
+    """Raw files inside training.training_window plus every symbol's indicator warm-up.
+
+    One file holds one trading day. Earlier files are added until each symbol
+    traded inside the window has ``lookback`` earlier trading days, so its
+    indicators inside the window match a full-history build. The walk back
+    stops ``training.warmup_max_days`` before the window: a symbol that traded
+    less often than that gets a shorter warm-up and approximate indicators on
+    its first days in the window. The daily pipeline avoids this by taking
+    warm-up closes from the full-history daily store instead. An 'all' window
+    keeps every file.
+    """
+    files = list_raw_files() if files is None else files
+    cutoff = window_cutoff(files)
+    if cutoff is None:
+        return files
+
+    dates = pd.to_datetime([_file_date(file) for file in files])
+    first = int(np.searchsorted(dates, cutoff, side='right'))
+    earliest = int(np.searchsorted(
+        dates, cutoff - pd.Timedelta(days=config['training'].get('warmup_max_days', 180)), side='right'
+    ))
+    manifest = load_raw_manifest()
+    warmup = {symbol: lookback for file in files[first:] for symbol in _file_symbols(file, manifest)}
+    if lookback <= 0:
+        warmup = {}
+
+    # Walk back until every symbol has its warm-up; a symbol with a shorter history
+    # (e.g. a new listing) only pulls in the files it actually traded on
+    start = first
+    for i in range(first - 1, earliest - 1, -1):
+        if not warmup:
+            break
+        for symbol in _file_symbols(files[i], manifest) & warmup.keys():
+            start = i
+            warmup[symbol] -= 1
+            if not warmup[symbol]:
+                del warmup[symbol]
+
+    # Symbols still short only when history continues past the cap
+    short = sorted(warmup) if earliest > 0 else []
+    if short:
+        logger.warning(f"Indicator warm-up stops at {os.path.basename(files[earliest])}; "
+                       f"fewer than {lookback} earlier days for {', '.join(short)}")
+
+    selected = files[start:]
+    logger.info(f"Training window after {cutoff.date()}: reading {len(selected)} of {len(files)} raw files")
+    return selected
+
+def load_raw_data(files=None):
+    """Load and concatenate the raw CSV files needed for the training window"""
+    raw_files = training_files() if files is None else files
+
+    if not raw_files:
+        logger.warning("No raw data files found")
+        return pd.DataFrame()
+
+    if config['data'].get('use_raw_cache', False):
+        sheets = _load_with_cache(raw_files)
+    else:
+        sheets = _read_floor_sheets(raw_files)
+    dfs = [sheets[file] for file in raw_files if file in sheets]
+
+    if not dfs:
+        return pd.DataFrame()
+
+    # Files are read in date order, so a stable sort keeps intra-day trade order
+    full_df = _concat_trades(dfs).sort_values('Date', kind='stable')
+
+    log_memory_usage(full_df)
     logger.info(f"Loaded {len(full_df)} records from {len(raw_files)} files")
-    return full_df
\ No newline at end of file
+    return full_df
@@ -1,112 +1,177 @@
 import pandas as pd
 import numpy as np
+from src.processing.broker_activity import BrokerActivity, LARGE_TRADE_VALUE
+from src.processing.indicators import compute_indicators, LOOKBACK, MA_WINDOW, STD_WINDOW, RSI_WINDOW
 from src.utils.config_loader import load_config
 from src.utils.logger import get_logger
 
 config = load_config()
 logger = get_logger('feature_engineering')
 
-def calculate_technical_features(df):
-    """Compute technical indicators for each symbol"""
+# Bump whenever feature logic changes so cached feature sets are recomputed
+FEATURE_VERSION = 1
+
+BROKER_MODES = ('relative', 'absolute')
+
+TECHNICAL_COLUMNS = ['Date', 'Symbol', '5d_ma', '14d_std', '14d_rsi', 'Volatility', 'Daily_Return', 'Volume']
+
+def feature_params():
+    """Configuration that determines feature values (part of the feature store key)"""
+    return {
+        'ma_window': MA_WINDOW,
+        'std_window': STD_WINDOW,
+        'rsi_window': RSI_WINDOW,
+        'broker_modes': list(BROKER_MODES),
+        'top_n_brokers': config['features'].get('top_n_brokers', 3)
+    }
+
+def summarize_daily(df):
+    """Reduce trades to daily OHLCV bars per symbol"""
     if df.empty:
         return pd.DataFrame()
-    
-    # Calculate daily summary
-    daily_summary = df.groupby(['Symbol', 'Date']).agg(
+
+    return df.groupby(['Symbol', 'Date'], observed=True).agg(
         Open=('Rate', 'first'),
         High=('Rate', 'max'),
         Low=('Rate', 'min'),
         Close=('Rate', 'last'),
         Volume=('Quantity', 'sum')
     ).reset_index()
-    
+
+def calculate_technical_features(df):
+    """Compute technical indicators for each symbol"""
+    if df.empty:
+        return pd.DataFrame()
+
+    daily_summary = compute_technical_indicators(summarize_daily(df))
+    return daily_summary[TECHNICAL_COLUMNS]
+
+def compute_technical_indicators(daily_summary):
+    """Add technical indicators to daily OHLCV bars"""
+    if daily_summary.empty:
+        return pd.DataFrame()
+
     # Sort by date
     daily_summary = daily_summary.sort_values(['Symbol', 'Date'])
     
-    # Technical indicators
-    def compute_ma(group, window=5):
-        return group.rolling(window, min_periods=1).mean()
-    
-    def compute_std(group, window=14):
-        return group.rolling(window, min_periods=1).std()
-    
-    def compute_rsi(group, window=14):
-        delta = group.diff()
-        gain = delta.where(delta > 0, 0)
-        loss = -delta.where(delta < 0, 0)
-        
-        avg_gain = gain.rolling(window, min_periods=1).mean()
-        avg_loss = loss.rolling(window, min_periods=1).mean()
-        
-        # Handle division by zero
-        with np.errstate(divide='ignore'):
-            rs = avg_gain / avg_loss
-            rsi = 100 - (100 / (1 + rs))
-
-        rsi.replace([np.inf, -np.inf], 100 if avg_loss == 0 else 0, inplace=True)
-        return rsi
-    
-    # Calculate features
-    daily_summary['5d_ma'] = daily_summary.groupby('Symbol')['Close'].transform(compute_ma)
-    daily_summary['14d_std'] = daily_summary.groupby('Symbol')['Close'].transform(compute_std)
-    daily_summary['14d_rsi'] = daily_summary.groupby('Symbol')['Close'].transform(compute_rsi)
-    
-    # Volatility
-    daily_summary['Volatility'] = daily_summary['14d_std'] / daily_summary['5d_ma']
-    
-    # Daily price change
-    daily_summary['Daily_Return'] = daily_summary.groupby('Symbol')['Close'].pct_change()
+    # Technical indicators in one vectorized pass over the sorted closes
+    symbol_codes, _ = pd.factorize(daily_summary['Symbol'])
+    indicators = compute_indicators(symbol_codes, daily_summary['Close'].to_numpy())
+    for name, values in indicators.items():
+        daily_summary[name] = values
     
     logger.info("Calculated technical features")
-    return daily_summary[['Date', 'Symbol', '5d_ma', '14d_std', '14d_rsi', 'Volatility', 'Daily_Return', 'Volume']]
+    return daily_summary
+
+def build_indicator_state(daily_features):
+    """Rolling state per symbol: the last LOOKBACK closes (oldest first, NaN-padded)"""
+    daily_features = daily_features.sort_values(['Symbol', 'Date'])
+    tail = daily_features.groupby('Symbol', observed=True).tail(LOOKBACK)
+    symbols, codes = np.unique(tail['Symbol'].astype(str).to_numpy(), return_inverse=True)
+
+    # Right-align each symbol's closes so the newest close sits in the last column
+    from_end = tail.groupby('Symbol', observed=True).cumcount(ascending=False).to_numpy()
+    closes = np.full((len(symbols), LOOKBACK), np.nan)
+    closes[codes, LOOKBACK - 1 - from_end] = tail['Close'].to_numpy()
+
+    return {
+        'symbols': symbols,
+        'closes': closes,
+        'last_date': daily_features['Date'].max().to_datetime64()
+    }
+
+def update_technical_features(daily_bars, state):
+    """Append indicator rows for days after the state's last date, updating the state in place.
+
+    Each new day costs O(symbols): the closes window of every symbol that traded
+    is shifted by one and only its newest row is recomputed.
+    """
+    new_bars = daily_bars[daily_bars['Date'] > state['last_date']].sort_values(['Date', 'Symbol'])
+    if new_bars.empty:
+        return pd.DataFrame()
+
+    positions = {symbol: i for i, symbol in enumerate(state['symbols'])}
+    symbols, closes = list(state['symbols']), state['closes']
+    rows = []
+
+    for date, day in new_bars.groupby('Date', sort=True):
+        day_symbols = day['Symbol'].astype(str).to_numpy()
+
+        # Register symbols seen for the first time
+        unseen = [symbol for symbol in day_symbols if symbol not in positions]
+        for symbol in unseen:
+            positions[symbol] = len(symbols)
+            symbols.append(symbol)
+        if unseen:
+            closes = np.vstack([closes, np.full((len(unseen), LOOKBACK), np.nan)])
+
+        # Shift each trading symbol's window by one day and append the new close
+        idx = np.array([positions[symbol] for symbol in day_symbols])
+        window = np.roll(closes[idx], -1, axis=1)
+        window[:, -1] = day['Close'].to_numpy()
+        closes[idx] = window
+
+        # Recompute indicators over each window and keep its newest row
+        valid = ~np.isnan(window)
+        keys = np.broadcast_to(np.arange(len(idx))[:, None], window.shape)[valid]
+        indicators = compute_indicators(keys, window[valid])
+        last = np.cumsum(valid.sum(axis=1)) - 1
+
+        day = day.copy()
+        for name, values in indicators.items():
+            day[name] = values[last]
+        rows.append(day)
+
+    state['symbols'] = np.array(symbols)
+    state['closes'] = closes
+    state['last_date'] = new_bars['Date'].max().to_datetime64()
+
+    logger.info(f"Incrementally updated technical features for {new_bars['Date'].nunique()} day(s)")
+    return pd.concat(rows, ignore_index=True)
 
 def calculate_broker_features(df, mode='relative'):
     """Compute broker behavior metrics"""
     if df.empty:
         return pd.DataFrame()
-    
-    # Create broker activity DataFrame
-    broker_activity = pd.DataFrame()
-    
-    # Buyer activity
-    buyer_activity = df[df['Trade_Type'] == 'Buy'].groupby(
-        ['Date', 'Symbol', 'BuyerBroker']
-    ).agg(Buy_Volume=('Quantity', 'sum')).reset_index()
-    
-    # Seller activity
-    seller_activity = df[df['Trade_Type'] == 'Sell'].groupby(
-        ['Date', 'Symbol', 'SellerBroker']
-    ).agg(Sell_Volume=('Quantity', 'sum')).reset_index()
-    
-    # Merge buyer and seller activity
-    broker_activity = pd.merge(
-        buyer_activity.rename(columns={'BuyerBroker': 'Broker'}),
-        seller_activity.rename(columns={'SellerBroker': 'Broker'}),
-        on=['Date', 'Symbol', 'Broker'],
-        how='outer'
-    ).fillna(0)
-    
-    # Net strength calculation
-    if mode == 'relative':
-        broker_activity['Net_Strength'] = (
-            (broker_activity['Buy_Volume'] - broker_activity['Sell_Volume']) / (broker_activity['Buy_Volume'] + broker_activity['Sell_Volume'] + 1e-6))
-    else:
-        broker_activity['Net_Strength'] = broker_activity['Buy_Volume'] - broker_activity['Sell_Volume']
-    
-    # Broker concentration (HHI)
-    symbol_daily = broker_activity.groupby(['Date', 'Symbol']).apply(
-        lambda x: (x['Net_Strength'].abs() / x['Net_Strength'].abs().sum()).pow(2).sum()
-    ).reset_index(name='Broker_HHI')
-    
-    # Large block trades (> 1 million NPR)
-    df['Trade_Value'] = df['Quantity'] * df['Rate']
-    large_trades = df[df['Trade_Value'] > 1e6].groupby(
-        ['Date', 'Symbol']
+
+    return calculate_broker_features_all_modes(df)[mode]
+
+def calculate_broker_features_all_modes(df):
+    """Compute broker behavior metrics for every broker mode in one pass"""
+    if df.empty:
+        return {mode: pd.DataFrame() for mode in BROKER_MODES}
+
+    activity = BrokerActivity.from_trades(df)
+    logger.info(f"Calculated broker features ({', '.join(BROKER_MODES)} modes)")
+    return activity.features(BROKER_MODES, top_n=config['features'].get('top_n_brokers', 3))
+
+def aggregate_broker_activity(df):
+    """Reduce trades to buy/sell volume per (Date, Symbol, Broker)"""
+    return BrokerActivity.from_trades(df).to_frame()
+
+def count_large_trades(df):
+    """Count large block trades (> 1 million NPR) per (Date, Symbol)"""
+    trade_value = df['Quantity'] * df['Rate']
+    return df[trade_value > LARGE_TRADE_VALUE].groupby(
+        ['Date', 'Symbol'], observed=True
     ).size().reset_index(name='Large_Trades_Count')
-    
-    # Merge features
-    broker_features = pd.merge(symbol_daily, large_trades, on=['Date', 'Symbol'], how='left')
-    broker_features['Large_Trades_Count'] = broker_features['Large_Trades_Count'].fillna(0)
-    
-    logger.info(f"Calculated broker features ({mode} mode)")
-    return broker_features
\ No newline at end of file
+
+def broker_features_from_activity(broker_activity, large_trades, mode='relative'):
+    """Compute broker behavior metrics from aggregated broker activity"""
+    return broker_features_all_modes(broker_activity, large_trades)[mode]
+
+def broker_features_all_modes(broker_activity, large_trades, top_n=None):
+    """Compute broker metrics for both broker modes from aggregated broker activity.
+
+    Activity is laid out as per-day sparse (symbols x brokers) matrices and net
+    strength, HHI, top-N broker share and broker count come from sparse row
+    reductions.
+    """
+    if broker_activity.empty:
+        return {mode: pd.DataFrame() for mode in BROKER_MODES}
+
+    top_n = top_n or config['features'].get('top_n_brokers', 3)
+    activity = BrokerActivity.from_activity(broker_activity, large_trades)
+
+    logger.info(f"Calculated broker features ({', '.join(BROKER_MODES)} modes)")
+    return activity.features(BROKER_MODES, top_n=top_n)
@@ -0,0 +1,114 @@
+# src/processing/indicators.py
+import numpy as np
+
+# Rolling windows for the technical indicators
+MA_WINDOW = 5
+STD_WINDOW = 14
+RSI_WINDOW = 14
+
+# Closes needed to recompute every indicator for the latest row (RSI needs one extra for the diff)
+LOOKBACK = max(MA_WINDOW, STD_WINDOW, RSI_WINDOW + 1)
+
+def segment_starts(keys):
+    """Index of the first row of each row's segment in a key-sorted array"""
+    keys = np.asarray(keys)
+    n = len(keys)
+    is_start = np.ones(n, dtype=bool)
+    if n > 1:
+        is_start[1:] = keys[1:] != keys[:-1]
+    return np.maximum.accumulate(np.where(is_start, np.arange(n), 0))
+
+def _windowed(values, seg_start, window):
+    """Yield (lagged values, valid mask) for each lag inside a segment-aware window"""
+    n = len(values)
+    positions = np.arange(n)
+    for lag in range(window):
+        lagged = np.empty(n, dtype=np.float64)
+        lagged[lag:] = values[:n - lag]
+        lagged[:lag] = np.nan
+        valid = (positions - lag >= seg_start) & ~np.isnan(lagged)
+        yield lagged, valid
+
+def rolling_sum(values, seg_start, window):
+    """Segment-aware rolling sum and count of non-NaN observations"""
+    values = np.asarray(values, dtype=np.float64)
+    total = np.zeros(len(values))
+    count = np.zeros(len(values))
+    for lagged, valid in _windowed(values, seg_start, window):
+        total += np.where(valid, lagged, 0.0)
+        count += valid
+    return total, count
+
+def rolling_mean(values, seg_start, window, min_periods=1):
+    """Segment-aware rolling mean"""
+    total, count = rolling_sum(values, seg_start, window)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = total / count
+    return np.where(count >= min_periods, mean, np.nan)
+
+def rolling_std(values, seg_start, window, min_periods=1, ddof=1):
+    """Segment-aware rolling standard deviation (two-pass for numerical stability)"""
+    values = np.asarray(values, dtype=np.float64)
+    total, count = rolling_sum(values, seg_start, window)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = total / count
+
+    squares = np.zeros(len(values))
+    for lagged, valid in _windowed(values, seg_start, window):
+        squares += np.where(valid, (lagged - mean) ** 2, 0.0)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        std = np.sqrt(squares / (count - ddof))
+    return np.where((count >= min_periods) & (count > ddof), std, np.nan)
+
+def segment_diff(values, seg_start):
+    """First difference within each segment (NaN on the first row of a segment)"""
+    values = np.asarray(values, dtype=np.float64)
+    diff = np.full(len(values), np.nan)
+    diff[1:] = values[1:] - values[:-1]
+    diff[np.arange(len(values)) == seg_start] = np.nan
+    return diff
+
+def rsi_from_averages(avg_gain, avg_loss):
+    """RSI from average gains/losses; 100 when there were gains but no losses"""
+    with np.errstate(invalid='ignore', divide='ignore'):
+        rsi = 100 - (100 / (1 + avg_gain / avg_loss))
+    return np.where((avg_loss == 0) & (avg_gain > 0), 100.0, rsi)
+
+def rolling_rsi(values, seg_start, window=RSI_WINDOW):
+    """Segment-aware RSI using simple rolling averages of gains and losses"""
+    delta = segment_diff(values, seg_start)
+    gain = np.where(delta > 0, delta, 0.0)
+    loss = np.where(delta < 0, -delta, 0.0)
+    return rsi_from_averages(
+        rolling_mean(gain, seg_start, window),
+        rolling_mean(loss, seg_start, window)
+    )
+
+def segment_pct_change(values, seg_start):
+    """Percent change within each segment (NaN on the first row of a segment)"""
+    values = np.asarray(values, dtype=np.float64)
+    change = np.full(len(values), np.nan)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        change[1:] = values[1:] / values[:-1] - 1
+    change[np.arange(len(values)) == seg_start] = np.nan
+    return change
+
+def compute_indicators(keys, close):
+    """Compute all technical indicators in one pass over (Symbol, Date)-sorted closes.
+
+    ``keys`` identifies the symbol of each row (e.g. categorical codes) and must
+    be sorted together with ``close``.
+    """
+    seg_start = segment_starts(keys)
+    ma = rolling_mean(close, seg_start, MA_WINDOW)
+    std = rolling_std(close, seg_start, STD_WINDOW)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        volatility = std / ma
+    return {
+        '5d_ma': ma,
+        '14d_std': std,
+        '14d_rsi': rolling_rsi(close, seg_start, RSI_WINDOW),
+        'Volatility': volatility,
+        'Daily_Return': segment_pct_change(close, seg_start)
+    }
@@ -0,0 +1,91 @@
+# src/processing/streaming.py
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from src.processing.data_loader import training_files, read_floor_sheet_chunks, ingest_workers
+from src.processing.feature_engineering import summarize_daily, aggregate_broker_activity, count_large_trades
+from src.utils.config_loader import load_config
+from src.utils.logger import get_logger
+
+config = load_config()
+logger = get_logger('streaming', config['logs']['log_dir'])
+
+def _combine(partials, keys, agg):
+    """Merge per-chunk partial aggregates into one aggregate per key"""
+    combined = pd.concat(partials, ignore_index=True)
+    combined['Symbol'] = combined['Symbol'].astype(str)
+    return combined.groupby(keys, sort=False).agg(**agg).reset_index()
+
+def reduce_floor_sheet(file, chunksize=None):
+    """Stream one floor sheet in chunks and reduce it to daily aggregates"""
+    chunksize = chunksize or config['data'].get('chunk_size', 100000)
+    bars, activity, large_trades = [], [], []
+
+    for chunk in read_floor_sheet_chunks(file, chunksize):
+        if chunk.empty:
+            continue
+        bars.append(summarize_daily(chunk))
+        activity.append(aggregate_broker_activity(chunk))
+        large_trades.append(count_large_trades(chunk))
+
+    if not bars:
+        return None
+
+    # Chunks arrive in trade order, so first/last across chunks keep open/close exact
+    bars = _combine(bars, ['Symbol', 'Date'], {
+        'Open': ('Open', 'first'),
+        'High': ('High', 'max'),
+        'Low': ('Low', 'min'),
+        'Close': ('Close', 'last'),
+        'Volume': ('Volume', 'sum')
+    })
+    activity = _combine(activity, ['Date', 'Symbol', 'Broker'], {
+        'Buy_Volume': ('Buy_Volume', 'sum'),
+        'Sell_Volume': ('Sell_Volume', 'sum')
+    })
+    large_trades = _combine(large_trades, ['Date', 'Symbol'], {
+        'Large_Trades_Count': ('Large_Trades_Count', 'sum')
+    })
+    return bars, activity, large_trades
+
+def _concat_days(frames):
+    """Concatenate per-day aggregates with a categorical Symbol column"""
+    df = pd.concat(frames, ignore_index=True)
+    df['Symbol'] = df['Symbol'].astype('category')
+    return df
+
+def stream_daily_aggregates(files=None):
+    """Reduce the training window's floor sheets to daily bars, broker activity and large-trade counts.
+
+    Raw trades are discarded after each file, so peak memory is bounded by one
+    day's sheet per worker regardless of history length.
+    """
+    files = training_files() if files is None else files
+    if not files:
+        logger.warning("No raw data files found")
+        return pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
+
+    workers = min(ingest_workers(), len(files))
+    results = []
+
+    if workers <= 1:
+        for file in files:
+            try:
+                results.append(reduce_floor_sheet(file))
+            except Exception as e:
+                logger.error(f"Error streaming {file}: {str(e)}")
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [(file, executor.submit(reduce_floor_sheet, file)) for file in files]
+            for file, future in futures:
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    logger.error(f"Error streaming {file}: {str(e)}")
+
+    results = [result for result in results if result is not None]
+    if not results:
+        return pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
+
+    bars, activity, large_trades = (_concat_days(frames) for frames in zip(*results))
+    logger.info(f"Streamed {len(files)} files into {len(bars)} daily bars")
+    return bars, activity, large_trades
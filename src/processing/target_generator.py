@@ -6,43 +6,72 @@ from src.utils.logger import get_logger
 config = load_config()
 logger = get_logger('target_generator')
 
-def generate_targets(price_data):
-    """Create labeled targets for different horizons"""
-    if price_data.empty:
-        return pd.DataFrame()
-    
-    thresholds = {
-        'next_day': (config['training']['threshold_buy'], 
+# Trading days ahead for each prediction horizon
+HORIZONS = {
+    'next_day': 1,
+    '3day': 3,
+    'weekly': 5
+}
+
+def horizon_thresholds():
+    """(buy, sell) return thresholds per horizon"""
+    return {
+        'next_day': (config['training']['threshold_buy'],
                      config['training']['threshold_sell']),
         '3day': (0.03, -0.03),
         'weekly': (0.05, -0.05)
     }
-    
-    horizon = config['training']['horizon']
-    buy_thresh, sell_thresh = thresholds[horizon]
-    
-    # Calculate future returns
+
+def generate_multi_horizon_targets(price_data):
+    """Future returns and labels for every horizon in one pass over the sorted closes.
+
+    Returns one wide table with Future_Return_<horizon> and Target_<horizon>
+    columns. Targets are missing where the future close is not yet known.
+    """
+    if price_data.empty:
+        return pd.DataFrame()
+
     price_data = price_data.sort_values(['Symbol', 'Date'])
-    price_data['Future_Price'] = price_data.groupby('Symbol')['Close'].shift(-1)
-    
-    if horizon == '3day':
-        price_data['Future_Price'] = price_data.groupby('Symbol')['Close'].shift(-3)
-    elif horizon == 'weekly':
-        price_data['Future_Price'] = price_data.groupby('Symbol')['Close'].shift(-5)
-    
-    price_data['Future_Return'] = (price_data['Future_Price'] / price_data['Close']) - 1
-    
-    # Create targets
-    conditions = [
-        price_data['Future_Return'] > buy_thresh,
-        price_data['Future_Return'] < sell_thresh
-    ]
-    choices = ['Buy', 'Sell']
-    
-    price_data['Target'] = np.select(conditions, choices, default='Hold')
-    
+    symbol_codes, _ = pd.factorize(price_data['Symbol'])
+    close = price_data['Close'].to_numpy(dtype=np.float64)
+    positions = np.arange(len(close))
+
+    targets = price_data[['Date', 'Symbol']].reset_index(drop=True)
+    thresholds = horizon_thresholds()
+
+    for horizon, steps in HORIZONS.items():
+        # Close `steps` rows ahead, only if it belongs to the same symbol
+        ahead = np.minimum(positions + steps, len(close) - 1)
+        same_symbol = (positions + steps < len(close)) & (symbol_codes[ahead] == symbol_codes)
+        future_return = np.where(same_symbol, close[ahead] / close - 1, np.nan)
+
+        buy_thresh, sell_thresh = thresholds[horizon]
+        labels = np.select(
+            [future_return > buy_thresh, future_return < sell_thresh],
+            ['Buy', 'Sell'],
+            default='Hold'
+        ).astype(object)
+        labels[np.isnan(future_return)] = None
+
+        targets[f"Future_Return_{horizon}"] = future_return
+        targets[f"Target_{horizon}"] = labels
+
+    logger.info(f"Generated targets for {', '.join(HORIZONS)} horizons")
+    return targets
+
+def select_horizon(targets, horizon=None):
+    """Long [Date, Symbol, Target] view of one horizon from the wide target table"""
+    if targets.empty:
+        return pd.DataFrame()
+
+    horizon = horizon or config['training']['horizon']
+    selected = targets[['Date', 'Symbol', f"Target_{horizon}"]].rename(
+        columns={f"Target_{horizon}": 'Target'}
+    )
+
     # Drop rows with missing targets
-    price_data = price_data.dropna(subset=['Target'])
-    
-    logger.info(f"Generated targets for {horizon} horizon")
-    return price_data[['Date', 'Symbol', 'Target']]
\ No newline at end of file
+    return selected.dropna(subset=['Target'])
+
+def generate_targets(price_data, horizon=None):
+    """Create labeled targets for the configured horizon"""
+    return select_horizon(generate_multi_horizon_targets(price_data), horizon)
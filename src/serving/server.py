@@ -0,0 +1,277 @@
+# src/serving/server.py
+import asyncio
+import json
+import time
+from collections import deque
+from urllib.parse import urlsplit, parse_qs
+from src.modeling.predictor import Predictor
+from src.modeling.trainer import model_path, model_exists
+from src.processing.target_generator import HORIZONS
+from src.utils.config_loader import load_config
+from src.utils.data_manager import load_model_metadata
+from src.utils.logger import get_logger
+
+config = load_config()
+logger = get_logger('server', config['logs']['log_dir'])
+
+STATUS_TEXT = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 500: 'Internal Server Error'}
+
+class Metrics:
+    """Request, batch and latency counters with a bounded window of recent latencies"""
+
+    def __init__(self, window=10000):
+        self.started = time.time()
+        self.requests = 0
+        self.errors = 0
+        self.batches = 0
+        self.batched_requests = 0
+        self.batched_symbols = 0
+        self.latencies = deque(maxlen=window)
+
+    def record_request(self, latency, error=False):
+        self.requests += 1
+        self.errors += int(error)
+        self.latencies.append(latency)
+
+    def record_batch(self, n_requests, n_symbols):
+        self.batches += 1
+        self.batched_requests += n_requests
+        self.batched_symbols += n_symbols
+
+    def snapshot(self):
+        uptime = time.time() - self.started
+        latencies = sorted(self.latencies)
+
+        def percentile(q):
+            return latencies[min(int(q * len(latencies)), len(latencies) - 1)] * 1000 if latencies else None
+
+        return {
+            'uptime_sec': uptime,
+            'requests': self.requests,
+            'errors': self.errors,
+            'requests_per_sec': self.requests / uptime if uptime else 0.0,
+            'batches': self.batches,
+            'mean_batch_requests': self.batched_requests / self.batches if self.batches else 0.0,
+            'mean_batch_symbols': self.batched_symbols / self.batches if self.batches else 0.0,
+            'latency_ms': {
+                'mean': sum(latencies) * 1000 / len(latencies) if latencies else None,
+                'p50': percentile(0.50),
+                'p95': percentile(0.95),
+                'p99': percentile(0.99)
+            }
+        }
+
+class MicroBatcher:
+    """Coalesces symbol requests for one horizon into a single batched predict_proba call.
+
+    The first queued request opens a window of ``window_ms``; everything arriving
+    before it closes (up to ``max_batch_size`` symbols) is scored together in a
+    worker thread so the event loop keeps accepting requests.
+    """
+
+    def __init__(self, predictor, metrics, window_ms=5, max_batch_size=512):
+        self.predictor = predictor
+        self.metrics = metrics
+        self.window = window_ms / 1000
+        self.max_batch_size = max_batch_size
+        self.queue = asyncio.Queue()
+        self.task = None
+
+    def start(self):
+        self.task = asyncio.create_task(self.run())
+
+    async def submit(self, symbol):
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((symbol, future))
+        return await future
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.window
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            symbols = list(dict.fromkeys(symbol for symbol, _ in batch))
+            try:
+                results = await loop.run_in_executor(None, self.predictor.batch_predict, symbols)
+                self.metrics.record_batch(len(batch), len(symbols))
+                for symbol, future in batch:
+                    if not future.done():
+                        future.set_result(results[symbol])
+            except Exception as e:
+                logger.error(f"Batch prediction failed: {str(e)}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+class PredictionServer:
+    """Localhost HTTP/1.1 JSON prediction service over warm per-horizon predictors"""
+
+    def __init__(self, host=None, port=None, horizons=None):
+        serving = config.get('serving', {})
+        self.host = host or serving.get('host', '127.0.0.1')
+        self.port = port or serving.get('port', 8765)
+        self.window_ms = serving.get('batch_window_ms', 5)
+        self.max_batch_size = serving.get('max_batch_size', 512)
+        self.reload_interval = serving.get('reload_interval_sec', 60)
+        self.horizons = horizons or config['training'].get('horizons', list(HORIZONS))
+        self.metrics = Metrics()
+        self.batchers = {}
+
+    def load_predictors(self):
+        """Predictors of every horizon whose saved model is new or changed version.
+
+        Runs in a worker thread, so it only reads ``self.batchers``; the event
+        loop applies the result with ``apply_predictors``.
+        """
+        predictors = {}
+        for horizon in self.horizons:
+            if not model_exists(horizon):
+                continue
+            batcher = self.batchers.get(horizon)
+            try:
+                version = load_model_metadata(model_path(horizon)).get('model_version')
+            except FileNotFoundError:
+                version = None
+            if batcher is not None and version == batcher.predictor.model_version:
+                continue
+            predictors[horizon] = Predictor(horizon=horizon)
+        return predictors
+
+    def apply_predictors(self, predictors):
+        """Swap new predictors in on the event loop, starting batchers for new horizons"""
+        batchers = dict(self.batchers)
+        for horizon, predictor in predictors.items():
+            batcher = batchers.get(horizon)
+            if batcher is None:
+                batcher = MicroBatcher(predictor, self.metrics, self.window_ms, self.max_batch_size)
+                batcher.start()
+                batchers[horizon] = batcher
+            else:
+                batcher.predictor = predictor
+            logger.info(f"Serving {horizon} model version {predictor.model_version}")
+        self.batchers = batchers
+
+    async def reload_loop(self):
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            try:
+                predictors = await asyncio.get_running_loop().run_in_executor(None, self.load_predictors)
+                self.apply_predictors(predictors)
+            except Exception as e:
+                logger.error(f"Model reload failed: {str(e)}")
+
+    async def predict(self, params):
+        horizon = params.get('horizon', [config['training']['horizon']])[0]
+        if horizon not in self.batchers:
+            return 404, {'error': f"No model for horizon '{horizon}'", 'horizons': sorted(self.batchers)}
+
+        symbols = [s for value in params.get('symbols', []) for s in value.split(',') if s]
+        symbols += params.get('symbol', [])
+        if not symbols:
+            return 400, {'error': "Pass symbol=<SYMBOL> or symbols=<A,B,...>"}
+
+        batcher = self.batchers[horizon]
+        results = await asyncio.gather(*(batcher.submit(symbol) for symbol in symbols))
+        if 'symbols' in params:
+            return 200, {'horizon': horizon, 'predictions': dict(zip(symbols, results))}
+        return 200, {'horizon': horizon, **results[0]}
+
+    async def route(self, method, target):
+        if method != 'GET':
+            return 405, {'error': f"Method {method} not allowed"}
+        url = urlsplit(target)
+        if url.path == '/predict':
+            return await self.predict(parse_qs(url.query))
+        if url.path == '/symbols':
+            horizon = parse_qs(url.query).get('horizon', [config['training']['horizon']])[0]
+            if horizon not in self.batchers:
+                return 404, {'error': f"No model for horizon '{horizon}'"}
+            symbols, _ = self.batchers[horizon].predictor.latest_features()
+            return 200, {'horizon': horizon, 'symbols': symbols.tolist()}
+        if url.path == '/metrics':
+            return 200, self.metrics.snapshot()
+        if url.path == '/health':
+            return 200, {
+                'status': 'ok',
+                'models': {horizon: b.predictor.model_version for horizon, b in self.batchers.items()}
+            }
+        return 404, {'error': f"Unknown path {url.path}"}
+
+    async def handle(self, reader, writer):
+        """Serve requests on one connection, keeping it alive unless the client closes"""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                start = time.perf_counter()
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                content_length = headers.get('content-length', '0')
+                try:
+                    method, target, _ = request_line.decode('latin-1').split(' ', 2)
+                except ValueError:
+                    method = None
+                    status, body = 400, {'error': "Malformed request line"}
+
+                if not content_length.isdigit():
+                    # The body cannot be skipped reliably, so the connection ends after the reply
+                    status, body = 400, {'error': "Invalid Content-Length header"}
+                    keep_alive = False
+                elif method is not None:
+                    if int(content_length):
+                        await reader.readexactly(int(content_length))
+                    try:
+                        status, body = await self.route(method, target)
+                    except Exception as e:
+                        logger.error(f"Request failed: {str(e)}")
+                        status, body = 500, {'error': str(e)}
+
+                payload = json.dumps(body, default=str).encode()
+                writer.write(
+                    f"HTTP/1.1 {status} {STATUS_TEXT[status]}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(payload)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + payload
+                )
+                await writer.drain()
+                self.metrics.record_request(time.perf_counter() - start, error=status >= 500)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self):
+        self.apply_predictors(self.load_predictors())
+        if not self.batchers:
+            raise RuntimeError("No trained models to serve; run the pipeline first")
+
+        server = await asyncio.start_server(self.handle, self.host, self.port)
+        logger.info(f"Prediction server listening on http://{self.host}:{self.port} for {', '.join(self.batchers)}")
+        reload_task = asyncio.create_task(self.reload_loop())
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            reload_task.cancel()
+
+def run_server(host=None, port=None):
+    asyncio.run(PredictionServer(host, port).serve())
@@ -14,10 +14,13 @@ def load_config():
     os.makedirs(config['data']['processed_path'], exist_ok=True)
     os.makedirs(config['data']['features_path'], exist_ok=True)
     os.makedirs(config['data']['targets_path'], exist_ok=True)
+    os.makedirs(config['data']['raw_cache_path'], exist_ok=True)
+    os.makedirs(config['data']['store_path'], exist_ok=True)
+    os.makedirs(config['data']['signals_path'], exist_ok=True)
     os.makedirs(config['logs']['log_dir'], exist_ok=True)
     
     # Model directories
-    model_base = os.path.join(config['models']['base_path'], 'random_forest')
+    model_base = os.path.join(config['models']['base_path'], config['models']['current_model'])
     for horizon in ['next_day', '3day', 'weekly']:
         os.makedirs(os.path.join(model_base, horizon), exist_ok=True)
     
@@ -2,19 +2,193 @@ import pandas as pd
 import os
 import joblib
 import json
+import shutil
+import hashlib
+import numpy as np
+from glob import glob
 from src.utils.config_loader import load_config
 
 config = load_config()
 
-def save_features(df, feature_name):
-    """Save processed features to disk"""
-    path = os.path.join(config['data']['features_path'], f"{feature_name}.feather")
-    df.reset_index(drop=True).to_feather(path)
+def feature_key(watermark, version, params):
+    """Content address of a feature set: hash of input watermark, feature code version and config"""
+    payload = json.dumps(
+        {'watermark': watermark, 'version': version, 'params': params},
+        sort_keys=True, default=str
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
 
-def load_features(feature_name):
-    """Load processed features from disk"""
-    path = os.path.join(config['data']['features_path'], f"{feature_name}.feather")
-    return pd.read_feather(path)
+def latest_feature_key():
+    """Key of the most recently written feature set, or None"""
+    path = os.path.join(config['data']['features_path'], "latest.json")
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)['key']
+    except (FileNotFoundError, json.JSONDecodeError, KeyError):
+        return None
+
+def _feature_path(feature_name, key=None):
+    """Path of a feature frame inside a keyed feature set (latest set if no key is given)"""
+    key = key or latest_feature_key()
+    if key is None:
+        return os.path.join(config['data']['features_path'], f"{feature_name}.feather")
+    return os.path.join(config['data']['features_path'], key, f"{feature_name}.feather")
+
+def _partition_dir(feature_name, key):
+    """Directory of a frame's monthly partitions inside a keyed feature set"""
+    return os.path.join(config['data']['features_path'], key, feature_name)
+
+def save_features(df, feature_name, key=None):
+    """Save processed features to disk, one file per month when stored in a keyed set"""
+    if key is None or 'Date' not in df.columns:
+        path = _feature_path(feature_name, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        df.reset_index(drop=True).to_feather(path)
+        return
+
+    partition_dir = _partition_dir(feature_name, key)
+    shutil.rmtree(partition_dir, ignore_errors=True)
+    os.makedirs(partition_dir)
+    # Every partition keeps the full category set, so partitions concatenate back to categoricals
+    months = df['Date'].dt.strftime('%Y-%m')
+    for month, part in df.groupby(months, sort=True):
+        part.reset_index(drop=True).to_feather(os.path.join(partition_dir, f"{month}.feather"))
+
+def load_features(feature_name, key=None, start=None):
+    """Load processed features from disk, skipping monthly partitions before ``start``"""
+    key = key or latest_feature_key()
+    partition_dir = _partition_dir(feature_name, key) if key else None
+    if partition_dir is None or not os.path.isdir(partition_dir):
+        df = pd.read_feather(_feature_path(feature_name, key))
+    else:
+        months = sorted(name[:-len('.feather')] for name in os.listdir(partition_dir))
+        if start is not None:
+            first_month = pd.Timestamp(start).strftime('%Y-%m')
+            months = [month for month in months if month >= first_month] or months[-1:]
+        df = pd.concat(
+            [pd.read_feather(os.path.join(partition_dir, f"{month}.feather")) for month in months],
+            ignore_index=True
+        )
+
+    if start is not None:
+        df = df[df['Date'] >= pd.Timestamp(start)].reset_index(drop=True)
+    # Partitions appended by incremental runs carry their own category sets
+    if 'Symbol' in df.columns and not isinstance(df['Symbol'].dtype, pd.CategoricalDtype):
+        df['Symbol'] = df['Symbol'].astype('category')
+    return df
+
+def feature_set_exists(key):
+    """Check whether a complete feature set has been written for a key"""
+    return os.path.exists(os.path.join(config['data']['features_path'], key, "manifest.json"))
+
+def save_feature_set(key, frames, info):
+    """Save named feature frames under a key, then mark the set complete and latest"""
+    for feature_name, df in frames.items():
+        save_features(df, feature_name, key)
+    _complete_feature_set(key, frames, info)
+
+def _link_or_copy(src, dst):
+    """Hard-link a file (copying where links are unsupported); feature files are never modified in place"""
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+def append_feature_set(base_key, key, frames, info):
+    """Save a feature set made of ``base_key``'s rows plus new rows in ``frames``.
+
+    Monthly partitions the new rows do not touch are hard-linked from the base
+    set; only the months they fall in are read back and rewritten.
+    """
+    for feature_name, df in frames.items():
+        base_dir = _partition_dir(feature_name, base_key)
+        if not os.path.isdir(base_dir):
+            save_features(pd.concat([load_features(feature_name, base_key), df], ignore_index=True), feature_name, key)
+            continue
+
+        partition_dir = _partition_dir(feature_name, key)
+        shutil.rmtree(partition_dir, ignore_errors=True)
+        os.makedirs(partition_dir)
+        months = df['Date'].dt.strftime('%Y-%m')
+        touched = set(months)
+        for name in os.listdir(base_dir):
+            if name[:-len('.feather')] not in touched:
+                _link_or_copy(os.path.join(base_dir, name), os.path.join(partition_dir, name))
+
+        for month, part in df.groupby(months, sort=True):
+            base_path = os.path.join(base_dir, f"{month}.feather")
+            if os.path.exists(base_path):
+                base = pd.read_feather(base_path)
+                base = base[~base['Date'].isin(part['Date'].unique())]
+                part = pd.concat([base, part], ignore_index=True)
+            part.reset_index(drop=True).to_feather(os.path.join(partition_dir, f"{month}.feather"))
+    _complete_feature_set(key, frames, info)
+
+def _complete_feature_set(key, frames, info):
+    """Write a feature set's manifest, marking it complete, and point latest.json at it"""
+    set_dir = os.path.join(config['data']['features_path'], key)
+    with open(os.path.join(set_dir, "manifest.json"), 'w') as f:
+        json.dump({'key': key, 'frames': sorted(frames), **info}, f, indent=2, default=str)
+
+    latest_path = os.path.join(config['data']['features_path'], "latest.json")
+    with open(f"{latest_path}.tmp", 'w') as f:
+        json.dump({'key': key}, f)
+    os.replace(f"{latest_path}.tmp", latest_path)
+
+def feature_set_version(key=None):
+    """Identity of the feature set read for ``key``: the key itself, or for no key the
+    latest set's key (or the legacy unkeyed files' modification time)"""
+    key = key or latest_feature_key()
+    if key is not None:
+        return key
+    path = _feature_path('technical')
+    return f"mtime:{os.path.getmtime(path)}" if os.path.exists(path) else None
+
+def load_feature_manifest(key=None):
+    """Manifest of a keyed feature set (latest set if no key is given), or {}"""
+    key = key or latest_feature_key()
+    if key is None:
+        return {}
+    try:
+        with open(os.path.join(config['data']['features_path'], key, "manifest.json"), 'r') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def model_feature_keys():
+    """Feature set keys referenced by the metadata of saved models"""
+    keys = set()
+    for path in glob(os.path.join(config['models']['base_path'], '*', '*', '*.json')):
+        try:
+            with open(path, 'r') as f:
+                key = json.load(f).get('feature_key')
+        except (OSError, json.JSONDecodeError):
+            continue
+        if key:
+            keys.add(key)
+    return keys
+
+def prune_feature_sets(keep=None):
+    """Delete feature sets beyond the ``keep`` newest, sparing the latest set and sets models use"""
+    keep = config['data'].get('feature_sets_kept', 3) if keep is None else keep
+    manifests = sorted(
+        glob(os.path.join(config['data']['features_path'], '*', "manifest.json")),
+        key=os.path.getmtime, reverse=True
+    )
+    protected = model_feature_keys() | {latest_feature_key()}
+
+    removed = []
+    for path in manifests[keep:]:
+        set_dir = os.path.dirname(path)
+        key = os.path.basename(set_dir)
+        if key not in protected:
+            shutil.rmtree(set_dir, ignore_errors=True)
+            removed.append(key)
+    return removed
+
+def load_feature_set(key, feature_names, start=None):
+    """Load named feature frames of a keyed feature set from ``start`` onwards"""
+    return {feature_name: load_features(feature_name, key, start) for feature_name in feature_names}
 
 def save_targets(df):
     """Save targets to disk"""
@@ -26,15 +200,270 @@ def load_targets():
     path = os.path.join(config['data']['targets_path'], "targets.feather")
     return pd.read_feather(path)
 
+def _signals_path(date):
+    date_str = pd.Timestamp(date).strftime('%Y-%m-%d')
+    return os.path.join(config['data']['signals_path'], f"signals_{date_str}.feather")
+
+def save_signals(df):
+    """Save precomputed signals, one table per feature date, replacing rows of the same horizons"""
+    for date, signals in df.groupby('Date'):
+        existing = load_signals(date)
+        if not existing.empty:
+            existing = existing[~existing['Horizon'].isin(signals['Horizon'].unique())]
+            signals = pd.concat([existing, signals], ignore_index=True)
+        signals.reset_index(drop=True).to_feather(_signals_path(date))
+
+def load_signals(date=None):
+    """Load the signal table of a feature date (latest table if no date is given)"""
+    if date is None:
+        tables = sorted(glob(os.path.join(config['data']['signals_path'], "signals_*.feather")))
+        path = tables[-1] if tables else None
+    else:
+        path = _signals_path(date)
+    if path is None or not os.path.exists(path):
+        return pd.DataFrame()
+    return pd.read_feather(path)
+
+def _replace_atomically(path, write):
+    """Write ``path`` through a temporary file so readers never see a partial artifact"""
+    tmp_path = f"{path}.tmp"
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+def replace_directory(tmp_dir, target):
+    """Swap a fully written directory into place of ``target``.
+
+    The live directory is moved aside first and deleted only afterwards, so
+    readers never see a half-written or half-deleted one.
+    """
+    old_dir = f"{target}.old"
+    shutil.rmtree(old_dir, ignore_errors=True)
+    if os.path.exists(target):
+        os.replace(target, old_dir)
+    os.replace(tmp_dir, target)
+    shutil.rmtree(old_dir, ignore_errors=True)
+
 def save_model(model, path, metadata):
-    """Save model with metadata"""
-    joblib.dump(model, path)
-    with open(path.replace('.pkl', '.json'), 'w') as f:
-        json.dump(metadata, f)
+    """Save model uncompressed (fast to load) with a JSON metadata sidecar.
+
+    The sidecar is written last and records the artifact size, so a reader that
+    sees a new model version also sees the model it describes.
+    """
+    _replace_atomically(path, lambda tmp_path: joblib.dump(model, tmp_path))
+    metadata = {**metadata, 'model_size_bytes': os.path.getsize(path)}
+
+    def write_metadata(tmp_path):
+        with open(tmp_path, 'w') as f:
+            json.dump(metadata, f, indent=2, default=str)
+    _replace_atomically(model_metadata_path(path), write_metadata)
+
+def model_metadata_path(path):
+    return f"{os.path.splitext(path)[0]}.json"
+
+def load_model_metadata(path):
+    """Load only a model's JSON metadata (cheap version checks)"""
+    with open(model_metadata_path(path), 'r') as f:
+        return json.load(f)
 
 def load_model(path):
     """Load model with metadata"""
+    metadata = load_model_metadata(path)
     model = joblib.load(path)
-    with open(path.replace('.pkl', '.json'), 'r') as f:
-        metadata = json.load(f)
-    return model, metadata
\ No newline at end of file
+    return model, metadata
+
+def _raw_partition_path(date_str):
+    return os.path.join(config['data']['raw_cache_path'], f"trades_{date_str}.feather")
+
+def save_raw_partition(df, date_str):
+    """Save one day's cleaned trades as a columnar partition"""
+    df.reset_index(drop=True).to_feather(_raw_partition_path(date_str))
+
+def load_raw_partition(date_str, columns=None):
+    """Load one day's cleaned trades (or only ``columns``) from the partition cache"""
+    return pd.read_feather(_raw_partition_path(date_str), columns=columns)
+
+def raw_partition_exists(date_str):
+    """Check whether a cached partition exists for a trading day"""
+    return os.path.exists(_raw_partition_path(date_str))
+
+def load_raw_manifest():
+    """Load the raw file manifest (file name -> size, mtime, hash)"""
+    path = os.path.join(config['data']['raw_cache_path'], "manifest.json")
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def save_raw_manifest(manifest):
+    """Save the raw file manifest atomically"""
+    path = os.path.join(config['data']['raw_cache_path'], "manifest.json")
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+# Open memory-mapped store partitions, keyed by directory -> (index mtime, index, columns)
+_store_cache = {}
+
+def _store_dir(name):
+    return os.path.join(config['data']['store_path'], name)
+
+def _store_partitions(name):
+    """Monthly partition directories of a daily store in date order.
+
+    A store written before partitioning is a single partition at the store root.
+    """
+    root = _store_dir(name)
+    if os.path.exists(os.path.join(root, "index.json")):
+        return [root]
+    return sorted(os.path.dirname(path) for path in
+                  glob(os.path.join(root, '[0-9][0-9][0-9][0-9]-[0-9][0-9]', "index.json")))
+
+def _write_store_partition(df, target):
+    """Write rows as per-column .npy files sorted by (Symbol, Date) with a symbol index"""
+    df = df.sort_values(['Symbol', 'Date'])
+    symbols = df['Symbol'].astype(str).to_numpy()
+
+    # Symbol -> [start, stop) row range
+    starts = np.flatnonzero(np.r_[True, symbols[1:] != symbols[:-1]])
+    stops = np.r_[starts[1:], len(symbols)]
+    index = {symbols[start]: [int(start), int(stop)] for start, stop in zip(starts, stops)}
+
+    tmp_dir = f"{target}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    columns = [col for col in df.columns if col != 'Symbol']
+    for col in columns:
+        values = df[col].to_numpy()
+        if col == 'Date':
+            values = values.astype('datetime64[ns]')
+        np.save(os.path.join(tmp_dir, f"{col}.npy"), np.ascontiguousarray(values))
+
+    with open(os.path.join(tmp_dir, "index.json"), 'w') as f:
+        json.dump({'columns': columns, 'symbols': index}, f)
+
+    replace_directory(tmp_dir, target)
+
+def _store_months(df):
+    return df['Date'].dt.strftime('%Y-%m')
+
+def save_daily_store(df, name='daily_bars'):
+    """Save daily rows as one symbol-indexed partition per month, replacing the whole store"""
+    target = _store_dir(name)
+    tmp_dir = f"{target}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    for month, part in df.groupby(_store_months(df), sort=True):
+        _write_store_partition(part, os.path.join(tmp_dir, month))
+    replace_directory(tmp_dir, target)
+
+def append_daily_store(df, name='daily_bars'):
+    """Add daily rows to a store, rewriting only the monthly partitions they fall in.
+
+    Stored rows of the same dates are replaced.
+    """
+    partitions = _store_partitions(name)
+    if partitions == [_store_dir(name)]:
+        # Unpartitioned store: convert it with one full rewrite
+        stored = load_daily_store(name)
+        stored = stored[~stored['Date'].isin(df['Date'].unique())]
+        save_daily_store(pd.concat([stored, df], ignore_index=True), name)
+        return
+
+    for month, part in df.groupby(_store_months(df), sort=True):
+        target = os.path.join(_store_dir(name), month)
+        if target in partitions:
+            stored = _partition_frame(target)
+            stored = stored[~stored['Date'].isin(part['Date'].unique())]
+            part = pd.concat([stored, part], ignore_index=True)
+        _write_store_partition(part, target)
+
+def _open_partition(part_dir):
+    """Memory-map a store partition, reopening only when it has been rewritten"""
+    index_path = os.path.join(part_dir, "index.json")
+    mtime = os.path.getmtime(index_path)
+    cached = _store_cache.get(part_dir)
+    if cached is not None and cached[0] == mtime:
+        return cached[1], cached[2]
+
+    with open(index_path, 'r') as f:
+        index = json.load(f)
+    columns = {
+        col: np.load(os.path.join(part_dir, f"{col}.npy"), mmap_mode='r')
+        for col in index['columns']
+    }
+    _store_cache[part_dir] = (mtime, index['symbols'], columns)
+    return index['symbols'], columns
+
+def _partition_frame(part_dir):
+    """Every row of one store partition as a DataFrame"""
+    symbols, columns = _open_partition(part_dir)
+    symbol_column = np.empty(sum(stop - start for start, stop in symbols.values()), dtype=object)
+    for symbol, (start, stop) in symbols.items():
+        symbol_column[start:stop] = symbol
+    df = pd.DataFrame({col: np.asarray(values) for col, values in columns.items()})
+    df.insert(0, 'Symbol', symbol_column)
+    return df
+
+def load_symbol_slice(symbol, name='daily_bars'):
+    """One symbol's rows as a dict of column -> array, oldest first.
+
+    Rows within one month are zero-copy memmap views; longer histories are
+    joined across the monthly partitions.
+    """
+    slices = []
+    for part_dir in _store_partitions(name):
+        symbols, columns = _open_partition(part_dir)
+        if symbol in symbols:
+            start, stop = symbols[symbol]
+            slices.append({col: values[start:stop] for col, values in columns.items()})
+    if not slices:
+        return None
+    if len(slices) == 1:
+        return slices[0]
+    return {col: np.concatenate([part[col] for part in slices]) for col in slices[0]}
+
+def load_symbol_history(symbol, name='daily_bars'):
+    """Load one symbol's history from the daily store as a DataFrame"""
+    symbol_slice = load_symbol_slice(symbol, name)
+    if symbol_slice is None:
+        return pd.DataFrame()
+    history = pd.DataFrame(symbol_slice)
+    history.insert(0, 'Symbol', symbol)
+    return history
+
+def daily_store_exists(name='daily_bars'):
+    """Check whether a daily store has been written"""
+    return bool(_store_partitions(name))
+
+def daily_store_last_date(name='daily_bars'):
+    """Latest date in a daily store, read from its newest partition only"""
+    _, columns = _open_partition(_store_partitions(name)[-1])
+    return pd.Timestamp(columns['Date'].max())
+
+def load_daily_store(name='daily_bars'):
+    """Load every row of a daily store as a DataFrame"""
+    df = pd.concat([_partition_frame(part_dir) for part_dir in _store_partitions(name)], ignore_index=True)
+    df['Symbol'] = df['Symbol'].astype('category')
+    return df
+
+def save_indicator_state(state):
+    """Save the rolling indicator state used for incremental feature updates"""
+    path = os.path.join(config['data']['features_path'], "indicator_state.npz")
+    np.savez(path, symbols=state['symbols'].astype(str), closes=state['closes'],
+             last_date=np.array(state['last_date'], dtype='datetime64[ns]'))
+
+def load_indicator_state():
+    """Load the rolling indicator state, or None if it has not been saved yet"""
+    path = os.path.join(config['data']['features_path'], "indicator_state.npz")
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as state:
+        return {
+            'symbols': state['symbols'],
+            'closes': state['closes'],
+            'last_date': state['last_date'][()]
+        }
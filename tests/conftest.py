@@ -0,0 +1,72 @@
+# tests/conftest.py
+import os
+import tempfile
+import pytest
+
+from src.utils.config_loader import load_config
+
+def pytest_configure(config):
+    # Data, model and log paths in config.yaml are relative to the working directory,
+    # so the suite runs in a scratch directory and never writes into the checkout.
+    # This runs after pytest has resolved testpaths and before test modules are imported.
+    os.chdir(tempfile.mkdtemp(prefix='nepse-tests-'))
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    """Empty working directory with the configured data, model and log directories"""
+    from src.modeling import predictor
+
+    monkeypatch.chdir(tmp_path)
+    load_config()
+    # Process-wide caches are keyed by relative paths and versions, which repeat across workspaces
+    predictor.model_cache.entries.clear()
+    predictor.prediction_cache.entries.clear()
+    predictor.feature_indexes.entries.clear()
+    return tmp_path
+
+def write_floor_sheets(n_days=100, seed=0):
+    """Synthetic floor sheets in data/raw, one CSV per trading day.
+
+    'SPARSE' trades every third day and 'LATE' lists two-thirds of the way in,
+    so per-symbol histories differ from the market calendar.
+    """
+    import numpy as np
+    import pandas as pd
+
+    config = load_config()
+    rng = np.random.default_rng(seed)
+    symbols = ['AAA', 'BBB', 'CCC', 'SPARSE', 'LATE']
+    prices = dict(zip(symbols, rng.uniform(200, 1000, len(symbols))))
+    dates = pd.bdate_range('2025-01-01', periods=n_days)
+    for day, date in enumerate(dates):
+        traded = [s for s in symbols if not (s == 'SPARSE' and day % 3) and not (s == 'LATE' and day < 2 * n_days // 3)]
+        rows = []
+        for symbol in traded:
+            prices[symbol] *= 1 + rng.normal(0, 0.02)
+            for _ in range(int(rng.integers(3, 8))):
+                quantity = int(rng.integers(10, 5000))
+                rate = round(prices[symbol] * (1 + rng.normal(0, 0.005)), 2)
+                rows.append({
+                    'Symbol': symbol,
+                    'Buyer': int(rng.integers(1, 60)),
+                    'Seller': int(rng.integers(1, 60)),
+                    'Quantity': f"{quantity:,}",
+                    'Rate': rate,
+                    'Amount': f"{quantity * rate:,.2f}"
+                })
+        sheet = pd.DataFrame(rows)
+        sheet.insert(0, 'SN', np.arange(1, len(sheet) + 1))
+        sheet.insert(1, 'ContractNo', 100000000000 + day * 1000 + sheet['SN'])
+        sheet.to_csv(f"{config['data']['raw_path']}/floor_sheet_data_{date:%Y-%m-%d}.csv", index=False)
+    return dates
+
+@pytest.fixture
+def floor_sheets(workspace):
+    return write_floor_sheets()
+
+@pytest.fixture
+def trained_pipeline(floor_sheets):
+    """Workspace after one daily pipeline run: features, a next_day model and signals"""
+    import main
+    main.run_pipeline()
+    return floor_sheets
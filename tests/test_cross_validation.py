@@ -0,0 +1,48 @@
+# tests/test_cross_validation.py
+import time
+import multiprocessing
+import numpy as np
+import pandas as pd
+import pytest
+from src.modeling import cross_validation
+from src.modeling.cross_validation import grid_search, walk_forward_folds
+
+@pytest.fixture
+def cv_data(workspace, monkeypatch):
+    """Three-class rows over 40 trading days, with two 10-day folds"""
+    monkeypatch.setitem(cross_validation.config, 'cv', {
+        'n_folds': 2, 'test_days': 10, 'mode': 'expanding', 'workers': 2
+    })
+    rng = np.random.default_rng(0)
+    dates = np.repeat(pd.bdate_range('2025-01-01', periods=40).to_numpy(), 30)
+    X = rng.normal(size=(len(dates), 4)).astype(np.float32)
+    y = np.digitize(X[:, 0], [-0.5, 0.5])
+    return X, y, dates
+
+def test_walk_forward_folds_test_after_train():
+    dates = np.repeat(pd.bdate_range('2025-01-01', periods=30).to_numpy(), 3)
+    folds = walk_forward_folds(dates, n_folds=2, test_days=5, mode='rolling', train_days=10)
+    assert len(folds) == 2
+    for train_idx, test_idx in folds:
+        assert dates[train_idx].max() < dates[test_idx].min()
+        assert len(np.unique(dates[train_idx])) == 10
+        assert len(np.unique(dates[test_idx])) == 5
+
+def test_failed_job_is_skipped(cv_data):
+    X, y, dates = cv_data
+    # min_samples_leaf=0 is rejected by the estimator in every fold
+    results, summary = grid_search(X, y, dates, param_grid={'n_estimators': [5], 'min_samples_leaf': [0, 1]})
+    assert set(results['min_samples_leaf']) == {1}
+    assert len(results) == 2
+    assert summary['folds'].tolist() == [2]
+
+def test_time_budget_bounds_wall_time(cv_data):
+    X, y, dates = cv_data
+    X, y, dates = np.tile(X, (20, 1)), np.tile(y, 20), np.tile(dates, 20)
+    start = time.perf_counter()
+    results, _ = grid_search(X, y, dates, param_grid={'n_estimators': [5, 400]}, time_budget=2)
+    elapsed = time.perf_counter() - start
+    # The small forests finish inside the budget; the large ones are stopped
+    assert elapsed < 5
+    assert set(results['n_estimators']) == {5}
+    assert not multiprocessing.active_children()
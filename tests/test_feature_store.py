@@ -0,0 +1,56 @@
+# tests/test_feature_store.py
+import os
+import shutil
+import pandas as pd
+import main
+from conftest import write_floor_sheets
+from src.processing.data_loader import list_raw_files
+from src.utils.config_loader import load_config
+from src.utils.data_manager import latest_feature_key, load_feature_set, load_daily_store
+from src.utils.logger import get_logger
+
+def _sorted(df):
+    df = df.copy()
+    df['Symbol'] = df['Symbol'].astype(str)
+    return df.sort_values(['Symbol', 'Date']).reset_index(drop=True)
+
+def _partition(key, feature_name, month):
+    return os.path.join(load_config()['data']['features_path'], key, feature_name, f"{month}.feather")
+
+def test_incremental_run_appends_only_new_months(workspace, monkeypatch):
+    incremental = load_config()
+    incremental['features']['incremental'] = True
+    monkeypatch.setattr(main, 'load_config', lambda: incremental)
+
+    # 60 trading days from January into March; the last 10 arrive in a second run
+    write_floor_sheets(n_days=60)
+    later = list_raw_files()[-10:]
+    os.makedirs('later')
+    for file in later:
+        shutil.move(file, 'later')
+    main.run_pipeline()
+    base_key = latest_feature_key()
+    store_january = os.path.join(load_config()['data']['store_path'], 'daily_bars', '2025-01', 'index.json')
+    january_mtime = os.stat(store_january).st_mtime_ns
+
+    for file in later:
+        shutil.move(os.path.join('later', os.path.basename(file)), file)
+    main.run_pipeline()
+    key = latest_feature_key()
+    assert key != base_key
+
+    # Untouched months are shared with the previous set and store; only March was rewritten
+    assert os.path.samefile(_partition(base_key, 'technical', '2025-01'), _partition(key, 'technical', '2025-01'))
+    assert not os.path.samefile(_partition(base_key, 'technical', '2025-03'), _partition(key, 'technical', '2025-03'))
+    assert os.stat(store_january).st_mtime_ns == january_mtime
+
+    appended = load_feature_set(key, main.FEATURE_SETS)
+    store = _sorted(load_daily_store())
+    full = main.build_features(load_config(), get_logger('test'), list_raw_files())
+    for name in main.FEATURE_SETS:
+        expected = _sorted(full[name])
+        pd.testing.assert_frame_equal(
+            _sorted(appended[name])[expected.columns], expected, check_dtype=False, check_categorical=False
+        )
+    expected = _sorted(load_daily_store())
+    pd.testing.assert_frame_equal(store[expected.columns], expected, check_dtype=False, check_categorical=False)
@@ -0,0 +1,67 @@
+# tests/test_flat_forest.py
+import json
+import os
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from src.modeling import predictor as predictor_module
+from src.modeling.flat_forest import FlatForest, flat_forest_path
+from src.modeling.predictor import Predictor
+from src.modeling.trainer import model_path
+
+@pytest.fixture(scope='module')
+def forest_and_data():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(3000, 6)).astype(np.float32)
+    y = np.digitize(X[:, 0] + rng.normal(0, 0.5, len(X)), [-0.5, 0.5])
+    model = RandomForestClassifier(n_estimators=25, class_weight='balanced', random_state=0).fit(X, y)
+    X_new = rng.normal(size=(200, 6)).astype(np.float32)
+    return model, X_new
+
+def test_predict_proba_matches_sklearn(forest_and_data):
+    model, X = forest_and_data
+    forest = FlatForest.from_model(model)
+    np.testing.assert_allclose(forest.predict_proba(X), model.predict_proba(X), rtol=0, atol=1e-12)
+    np.testing.assert_array_equal(forest.predict(X), model.predict(X))
+    # Leaf ids are global node ids: subtracting each tree's root offset gives sklearn's
+    np.testing.assert_array_equal(forest.apply(X) - forest.roots[:, None], model.apply(X).T)
+
+def test_single_row_matches_sklearn(forest_and_data):
+    model, X = forest_and_data
+    forest = FlatForest.from_model(model)
+    np.testing.assert_allclose(forest.predict_proba(X[:1]), model.predict_proba(X[:1]), rtol=0, atol=1e-12)
+
+def test_saved_export_is_memory_mapped(forest_and_data, tmp_path):
+    model, X = forest_and_data
+    path = str(tmp_path / 'flat_forest')
+    FlatForest.from_model(model, 'v1').save(path)
+    loaded = FlatForest.load(path)
+    assert isinstance(loaded.values, np.memmap)
+    assert loaded.model_version == 'v1'
+    np.testing.assert_allclose(loaded.predict_proba(X), model.predict_proba(X), rtol=0, atol=1e-12)
+    assert not os.path.exists(f"{path}.tmp")
+
+@pytest.fixture
+def flat_backend(trained_pipeline, monkeypatch):
+    monkeypatch.setitem(predictor_module.config['serving'], 'backend', 'flat')
+    return flat_forest_path(model_path('next_day'))
+
+def test_predictor_scores_from_export(flat_backend):
+    predictor = Predictor('next_day')
+    assert isinstance(predictor.scorer, FlatForest)
+    symbols, X = predictor.latest_features()
+    np.testing.assert_allclose(predictor.scorer.predict_proba(X), predictor.model.predict_proba(X), atol=1e-12)
+
+def test_truncated_export_falls_back_to_sklearn(flat_backend):
+    values = os.path.join(flat_backend, 'values.npy')
+    with open(values, 'r+b') as f:
+        f.truncate(os.path.getsize(values) // 2)
+    predictor = Predictor('next_day')
+    assert predictor.scorer is predictor.model
+    assert predictor.batch_predict()
+
+def test_export_of_another_version_falls_back_to_sklearn(flat_backend):
+    with open(os.path.join(flat_backend, 'forest.json'), 'w') as f:
+        json.dump({'model_version': 'stale'}, f)
+    predictor = Predictor('next_day')
+    assert predictor.scorer is predictor.model
@@ -0,0 +1,69 @@
+# tests/test_indicators.py
+import numpy as np
+import pandas as pd
+from src.processing.indicators import compute_indicators, MA_WINDOW, STD_WINDOW, RSI_WINDOW
+
+def _reference(frame):
+    """Per-symbol pandas rolling indicators, one group at a time"""
+    close = frame.groupby('Symbol')['Close']
+    delta = close.diff()
+    gain = delta.where(delta > 0, 0.0).groupby(frame['Symbol'])
+    loss = (-delta).where(delta < 0, 0.0).groupby(frame['Symbol'])
+    avg_gain = gain.transform(lambda s: s.rolling(RSI_WINDOW, min_periods=1).mean())
+    avg_loss = loss.transform(lambda s: s.rolling(RSI_WINDOW, min_periods=1).mean())
+    rsi = 100 - 100 / (1 + avg_gain / avg_loss)
+    rsi[(avg_loss == 0) & (avg_gain > 0)] = 100.0
+
+    ma = close.transform(lambda s: s.rolling(MA_WINDOW, min_periods=1).mean())
+    std = close.transform(lambda s: s.rolling(STD_WINDOW, min_periods=1).std())
+    return {
+        '5d_ma': ma,
+        '14d_std': std,
+        '14d_rsi': rsi,
+        'Volatility': std / ma,
+        'Daily_Return': close.pct_change()
+    }
+
+def test_rolling_indicators_match_pandas_at_segment_boundaries():
+    # Segments shorter, equal to and longer than every window, including single-row symbols
+    rng = np.random.default_rng(1)
+    lengths = [1, 2, 1, MA_WINDOW, STD_WINDOW, STD_WINDOW + 1, 3, 40]
+    frame = pd.DataFrame({
+        'Symbol': np.repeat([f"S{i}" for i in range(len(lengths))], lengths),
+        'Close': rng.uniform(50, 150, sum(lengths))
+    })
+    # Flat runs exercise the no-loss RSI branch
+    frame.loc[frame.index[-10:], 'Close'] = 100.0
+
+    codes, _ = pd.factorize(frame['Symbol'])
+    indicators = compute_indicators(codes, frame['Close'].to_numpy())
+    for name, expected in _reference(frame).items():
+        np.testing.assert_allclose(indicators[name], expected.to_numpy(), rtol=1e-9, err_msg=name)
+
+def test_incremental_update_matches_full_rebuild():
+    from src.processing.feature_engineering import (
+        compute_technical_indicators, build_indicator_state, update_technical_features
+    )
+
+    rng = np.random.default_rng(2)
+    dates = pd.bdate_range('2025-01-01', periods=40)
+    rows = []
+    for day, date in enumerate(dates):
+        for symbol in ['AAA', 'BBB', 'SPARSE', 'LATE']:
+            # SPARSE trades every third day and LATE first trades after the split
+            if (symbol == 'SPARSE' and day % 3) or (symbol == 'LATE' and day < 32):
+                continue
+            rows.append({'Symbol': symbol, 'Date': date, 'Close': rng.uniform(50, 150), 'Volume': 100})
+    bars = pd.DataFrame(rows)
+    split = dates[30]
+
+    state = build_indicator_state(compute_technical_indicators(bars[bars['Date'] <= split]))
+    incremental = update_technical_features(bars, state)
+    full = compute_technical_indicators(bars)
+    full = full[full['Date'] > split]
+
+    key = ['Symbol', 'Date']
+    incremental = incremental.sort_values(key).reset_index(drop=True)
+    full = full.sort_values(key).reset_index(drop=True)
+    pd.testing.assert_frame_equal(incremental[full.columns], full, check_dtype=False)
+    assert state['last_date'] == dates[-1].to_datetime64()
@@ -0,0 +1,102 @@
+# tests/test_predictor.py
+import numpy as np
+import pytest
+from src.modeling.predictor import Predictor
+
+def test_batch_predict_matches_single_predictions(trained_pipeline):
+    predictor = Predictor('next_day')
+    symbols, X = predictor.latest_features()
+    assert len(symbols) > 0
+
+    batch = predictor.batch_predict()
+    for symbol, row in zip(symbols, X):
+        single = predictor._results([symbol], row[None, :])[symbol]
+        assert batch[symbol]['signal'] == single['signal']
+        np.testing.assert_allclose(
+            list(batch[symbol]['probabilities'].values()), list(single['probabilities'].values())
+        )
+    assert set(predictor.batch_predict(['NOPE'] + list(symbols[:1]))) == {'NOPE', symbols[0]}
+    assert predictor.batch_predict(['NOPE'])['NOPE']['signal'] == 'Unavailable'
+
+def test_cached_prediction_cannot_be_mutated_by_callers(trained_pipeline):
+    predictor = Predictor('next_day')
+    symbol = predictor.latest_features()[0][0]
+    first = predictor.predict(symbol)
+    expected = dict(first['probabilities'])
+
+    first['probabilities'].clear()
+    first['features']['Volume'] = -1.0
+    second = predictor.predict(symbol)
+    assert second['probabilities'] == expected
+    assert second['features']['Volume'] != -1.0
+
+def test_other_broker_mode_is_not_scored(trained_pipeline):
+    from src.modeling.predictor import MultiPredictor
+
+    predictor = MultiPredictor(horizons=['next_day'])
+    trained = predictor.trained_broker_mode('next_day')
+    other = 'absolute' if trained == 'relative' else 'relative'
+    symbol = predictor.predictor('next_day').latest_features()[0][0]
+
+    assert predictor.predict(symbol, trained)['next_day']['signal'] != 'Unavailable'
+    result = predictor.predict(symbol, other)['next_day']
+    assert result['signal'] == 'Unavailable'
+    assert 'probabilities' not in result and trained in result['reason']
+    batch = predictor.batch_predict([symbol], other)['next_day']
+    assert batch[symbol]['signal'] == 'Unavailable'
+    with pytest.raises(ValueError):
+        Predictor('next_day', broker_mode=other)
+
+def test_feature_index_follows_latest_feature_set(trained_pipeline):
+    import json
+    import os
+    import shutil
+    from src.modeling import predictor
+    from src.utils.config_loader import load_config
+    from src.utils.data_manager import latest_feature_key
+
+    config = load_config()
+    mode = config['training']['broker_mode']
+    columns = Predictor('next_day').feature_columns
+    first = predictor.feature_index(None, mode, columns)
+    assert predictor.feature_index(None, mode, columns) is first
+
+    # A legacy model without a feature key must pick up a newer feature set
+    features_path = config['data']['features_path']
+    shutil.copytree(os.path.join(features_path, latest_feature_key()), os.path.join(features_path, 'newer'))
+    with open(os.path.join(features_path, 'latest.json'), 'w') as f:
+        json.dump({'key': 'newer'}, f)
+    assert predictor.feature_index(None, mode, columns) is not first
+    assert len(predictor.feature_indexes.entries) <= predictor.feature_indexes.maxsize
+
+def test_back_to_back_retrains_get_distinct_versions(trained_pipeline):
+    from src.modeling.predictor import model_cache
+    from src.modeling.trainer import IncrementalTrainer
+
+    first = model_cache.get('next_day')[1]
+    trainer = IncrementalTrainer('next_day')
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(60, len(trainer.feature_columns))).astype(np.float32)
+    y = np.arange(60) % 3
+    trainer.fit(X, y, feature_key='retrained')
+    trainer.fit(X, y, feature_key='retrained-again')
+
+    latest = model_cache.get('next_day')[1]
+    assert latest['model_version'] != first['model_version']
+    assert latest['feature_key'] == 'retrained-again'
+
+def test_multi_predictor_refresh_picks_up_a_retrained_model(trained_pipeline):
+    from src.modeling.predictor import MultiPredictor
+    from src.modeling.trainer import IncrementalTrainer
+
+    predictor = MultiPredictor(horizons=['next_day'])
+    old_version = predictor.predictor('next_day').model_version
+    assert predictor.refresh() == []
+
+    trainer = IncrementalTrainer('next_day')
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(60, len(trainer.feature_columns))).astype(np.float32)
+    trainer.fit(X, np.arange(60) % 3, feature_key=predictor.predictor('next_day').metadata.get('feature_key'))
+
+    assert predictor.refresh() == ['next_day']
+    assert predictor.predictor('next_day').model_version != old_version
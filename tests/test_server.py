@@ -0,0 +1,73 @@
+# tests/test_server.py
+import asyncio
+import json
+from src.serving.server import PredictionServer
+
+async def _exchange(port, raw):
+    """Send one raw request and return (status, body)"""
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(raw)
+    await writer.drain()
+    status_line = await reader.readline()
+    headers = {}
+    while (line := await reader.readline()) not in (b'\r\n', b''):
+        name, _, value = line.decode().partition(':')
+        headers[name.strip().lower()] = value.strip()
+    body = await reader.readexactly(int(headers['content-length']))
+    writer.close()
+    return int(status_line.split()[1]), json.loads(body)
+
+def _get(target, headers=''):
+    return f"GET {target} HTTP/1.1\r\nHost: localhost\r\n{headers}Connection: close\r\n\r\n".encode()
+
+async def _run_requests(server, requests):
+    server.apply_predictors(server.load_predictors())
+    listener = await asyncio.start_server(server.handle, '127.0.0.1', 0)
+    port = listener.sockets[0].getsockname()[1]
+    try:
+        return [await _exchange(port, raw) for raw in requests]
+    finally:
+        listener.close()
+        for batcher in server.batchers.values():
+            batcher.task.cancel()
+
+def test_status_codes(trained_pipeline):
+    server = PredictionServer(horizons=['next_day'])
+    responses = asyncio.run(_run_requests(server, [
+        _get('/predict?horizon=next_day&symbol=AAA'),
+        _get('/predict?horizon=next_day'),
+        _get('/predict?horizon=weekly&symbol=AAA'),
+        _get('/nowhere'),
+        b"POST /predict HTTP/1.1\r\nContent-Length: 2\r\nConnection: close\r\n\r\n{}",
+        b"garbage\r\nConnection: close\r\n\r\n",
+        _get('/predict?symbol=AAA', headers='Content-Length: abc\r\n'),
+        _get('/metrics')
+    ]))
+    statuses = [status for status, _ in responses]
+    assert statuses == [200, 400, 404, 404, 405, 400, 400, 200]
+    assert responses[0][1]['horizon'] == 'next_day'
+    assert 'Content-Length' in responses[6][1]['error']
+
+def test_prediction_errors_are_server_errors(trained_pipeline):
+    class Failing:
+        model_version = None
+
+        def batch_predict(self, symbols):
+            raise ValueError("scoring failed")
+
+    server = PredictionServer(horizons=['next_day'])
+
+    async def run():
+        server.apply_predictors(server.load_predictors())
+        server.batchers['next_day'].predictor = Failing()
+        listener = await asyncio.start_server(server.handle, '127.0.0.1', 0)
+        try:
+            return await _exchange(listener.sockets[0].getsockname()[1], _get('/predict?symbol=AAA'))
+        finally:
+            listener.close()
+            server.batchers['next_day'].task.cancel()
+
+    status, body = asyncio.run(run())
+    assert status == 500
+    assert body['error'] == "scoring failed"
+    assert server.metrics.errors == 1
@@ -0,0 +1,34 @@
+# tests/test_streaming.py
+import pandas as pd
+from conftest import write_floor_sheets
+from src.processing import streaming
+from src.processing.data_loader import load_raw_data, list_raw_files
+from src.processing.feature_engineering import (
+    summarize_daily, calculate_broker_features_all_modes, broker_features_all_modes, BROKER_MODES
+)
+
+def _sorted(df, keys):
+    df = df.copy()
+    df['Symbol'] = df['Symbol'].astype(str)
+    return df.sort_values(keys).reset_index(drop=True)
+
+def test_streaming_matches_full_ingest(workspace, monkeypatch):
+    write_floor_sheets(n_days=20)
+    # Chunks far smaller than a day's sheet, so every day spans several chunks
+    monkeypatch.setitem(streaming.config['data'], 'chunk_size', 4)
+    files = list_raw_files()
+    daily_bars, broker_activity, large_trades = streaming.stream_daily_aggregates(files)
+
+    raw_data = load_raw_data(files)
+    keys = ['Symbol', 'Date']
+    pd.testing.assert_frame_equal(
+        _sorted(daily_bars, keys), _sorted(summarize_daily(raw_data), keys)[daily_bars.columns], check_dtype=False
+    )
+
+    streamed = broker_features_all_modes(broker_activity, large_trades)
+    loaded = calculate_broker_features_all_modes(raw_data)
+    for mode in BROKER_MODES:
+        pd.testing.assert_frame_equal(
+            _sorted(streamed[mode], ['Date', 'Symbol']), _sorted(loaded[mode], ['Date', 'Symbol']),
+            check_dtype=False, check_categorical=False
+        )
@@ -0,0 +1,35 @@
+# tests/test_trainer.py
+import numpy as np
+from src.modeling import trainer as trainer_module
+from src.modeling.trainer import IncrementalTrainer
+
+def test_rolling_forest_reseeds_new_trees(workspace, monkeypatch):
+    monkeypatch.setitem(trainer_module.config['training'], 'max_trees', 20)
+    monkeypatch.setitem(trainer_module.config['training'], 'trees_per_run', 5)
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(90, 4)).astype(np.float32)
+    y = np.arange(90) % 3
+
+    seeds = []
+    for run in range(4):
+        # A fresh trainer per run, as in the nightly pipeline
+        trainer = IncrementalTrainer('next_day', n_jobs=1, engine='random_forest')
+        trainer.feature_columns = ['a', 'b', 'c', 'd']
+        trainer.fit(X, y)
+        assert len(trainer.model.estimators_) == 20
+        if run:
+            seeds.append(tuple(tree.random_state for tree in trainer.model.estimators_[-5:]))
+
+    # Eviction holds the tree count at max_trees, yet every run's new trees get fresh draws
+    assert len(set(seeds)) == len(seeds)
+    assert trainer.trees_fitted == 105 + 3 * 5
+
+def test_boosting_threads_follow_the_job_budget():
+    from threadpoolctl import threadpool_info
+    from src.modeling.engines import get_engine
+
+    engine = get_engine('hist_gradient_boosting')
+    openmp = [pool for pool in threadpool_info() if pool['user_api'] == 'openmp']
+    assert openmp, "scikit-learn's OpenMP runtime is not loaded"
+    with engine.threads(1):
+        assert all(pool['num_threads'] == 1 for pool in threadpool_info() if pool['user_api'] == 'openmp')
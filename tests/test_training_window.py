@@ -0,0 +1,89 @@
+# tests/test_training_window.py
+import logging
+import pandas as pd
+import pytest
+from pandas.testing import assert_frame_equal
+import main
+from src.modeling import feature_matrix
+from src.processing import data_loader
+from src.processing.data_loader import list_raw_files, load_raw_data, training_files, window_cutoff, files_after
+from src.processing.feature_engineering import summarize_daily, compute_technical_indicators
+from src.utils.data_manager import load_daily_store
+
+@pytest.fixture
+def windowed(floor_sheets, monkeypatch):
+    monkeypatch.setitem(data_loader.config['training'], 'training_window', 30)
+    monkeypatch.setitem(data_loader.config['data'], 'ingest_workers', 1)
+    return floor_sheets
+
+def technical(files):
+    return compute_technical_indicators(summarize_daily(load_raw_data(files)))
+
+def on_or_after(df, cutoff):
+    df = df[df['Date'] > cutoff].copy()
+    df['Symbol'] = df['Symbol'].astype(str)
+    return df.sort_values(['Symbol', 'Date']).reset_index(drop=True)
+
+@pytest.mark.parametrize('use_raw_cache', [False, True])
+def test_windowed_features_match_full_build(windowed, monkeypatch, use_raw_cache):
+    monkeypatch.setitem(data_loader.config['data'], 'use_raw_cache', use_raw_cache)
+    all_files = list_raw_files()
+    full = technical(all_files)
+    if use_raw_cache:
+        # Second selection reads symbols from the raw cache manifest
+        load_raw_data(all_files)
+    files = training_files()
+    cutoff = window_cutoff()
+    assert len(files) < len(all_files)
+
+    windowed_rows = on_or_after(technical(files), cutoff)
+    full_rows = on_or_after(full, cutoff)
+    assert set(windowed_rows['Symbol']) == {'AAA', 'BBB', 'CCC', 'SPARSE', 'LATE'}
+    assert_frame_equal(windowed_rows, full_rows, check_categorical=False)
+
+def test_sparse_symbol_gets_its_own_warmup(windowed):
+    files = training_files()
+    cutoff = window_cutoff()
+    sparse_days_before = (
+        summarize_daily(load_raw_data(files)).query("Symbol == 'SPARSE' and Date <= @cutoff")['Date'].nunique()
+    )
+    assert sparse_days_before >= data_loader.LOOKBACK
+
+def test_training_matrix_window_starts_at_file_cutoff(windowed):
+    full = technical(list_raw_files())
+    latest_date = full['Date'].max()
+    # Rows near the end are unlabelled, so the latest labelled date lags the latest feature date
+    labelled = full[full['Date'] < latest_date - pd.Timedelta(days=3)]
+    kept = feature_matrix.apply_training_window(labelled, latest_date)
+    assert kept['Date'].min() > window_cutoff()
+    assert kept['Date'].min() - window_cutoff() <= pd.Timedelta(days=3)
+
+def test_sparse_warmup_walk_is_capped(windowed, monkeypatch):
+    # SPARSE trades every third day, so 15 of its days reach back about 63 calendar days
+    monkeypatch.setitem(data_loader.config['training'], 'warmup_max_days', 20)
+    files = training_files()
+    first_date = pd.Timestamp(files[0].split('_')[-1].replace('.csv', ''))
+    assert window_cutoff() - first_date <= pd.Timedelta(days=20)
+
+def test_windowed_build_keeps_daily_store_full_history(windowed):
+    logger = logging.getLogger('test')
+    all_files = list_raw_files()
+    main.build_features(main.load_config(), logger, all_files)
+    full_store = load_daily_store()
+
+    # As in the pipeline: only files after the cutoff, with warm-up closes from the store
+    cutoff = window_cutoff(all_files)
+    files = files_after(all_files, cutoff)
+    frames = main.build_features(main.load_config(), logger, files, cutoff)
+    assert frames['daily']['Date'].min() > cutoff
+    for name in ['daily', 'technical']:
+        expected = on_or_after(full_store, cutoff)[frames[name].columns]
+        assert_frame_equal(on_or_after(frames[name], cutoff), expected, check_categorical=False, check_dtype=False)
+
+    store = load_daily_store()
+    assert len(store) == len(full_store)
+    assert_frame_equal(
+        store.sort_values(['Symbol', 'Date']).reset_index(drop=True),
+        full_store.sort_values(['Symbol', 'Date']).reset_index(drop=True),
+        check_categorical=False
+    )